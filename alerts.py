@@ -0,0 +1,242 @@
+import asyncio
+import json
+import math
+import os
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+import discord
+from discord.ext import commands
+import settings
+import price_store
+
+class AlertEngine:
+    """
+    Price alerts checked on every price tick. Each token has two sorted
+    indexes of (threshold, alert id): price levels, which fire when the
+    price crosses them, and percentage moves, which fire when the price
+    has moved that much over ALERT_MOVE_WINDOW. A tick bisects straight to
+    the alerts it triggers, so its cost doesn't grow with the number of
+    alerts that stay quiet. Alerts fire once and are then removed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.alerts = {}        # alert id -> alert dict
+        self._levels = {}       # token -> sorted [(price level, id)]
+        self._moves = {}        # token -> sorted [(percent, id)]
+        self._last_price = {}   # token -> price at the previous tick
+        self._window = {}       # token -> deque of (ts, price) over the move window
+        self._next_id = 1
+
+    def load(self):
+        """Read saved alerts and seed prices from the local price history"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    saved = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading alerts: {str(e)}")
+                saved = []
+            for alert in saved:
+                self._index(alert)
+        for token_type in settings.TOKENS:
+            samples = price_store.store.series(token_type).range(time.time() - settings.ALERT_MOVE_WINDOW)
+            window = self._window.setdefault(token_type, deque())
+            window.extend(zip(samples['ts'].tolist(), samples['price'].tolist()))
+            if window:
+                self._last_price[token_type] = window[-1][1]
+        print(f"Loaded {len(self.alerts)} price alerts")
+
+    def _write(self, alerts):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(alerts, f)
+        os.replace(tmp_path, self.path)
+
+    async def save(self):
+        """Persist all alerts, writing the file off the event loop"""
+        alerts = list(self.alerts.values())
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, alerts)
+        except Exception as e:
+            print(f"Error saving alerts: {str(e)}")
+
+    def _index(self, alert):
+        self.alerts[alert['id']] = alert
+        self._next_id = max(self._next_id, alert['id'] + 1)
+        index = self._levels if alert['kind'] == 'level' else self._moves
+        entries = index.setdefault(alert['token'], [])
+        entries.insert(bisect_left(entries, (alert['threshold'], alert['id'])), (alert['threshold'], alert['id']))
+
+    def add(self, token_type, kind, threshold, channel_id, user_id):
+        """
+        Create an alert
+
+        Args:
+            kind (str): 'level' to fire when the price crosses threshold (USD),
+                        'move' to fire on a threshold percent move
+        """
+        alert = {
+            'id': self._next_id,
+            'token': token_type,
+            'kind': kind,
+            'threshold': threshold,
+            'channel_id': channel_id,
+            'user_id': user_id,
+            'created': time.time()
+        }
+        self._index(alert)
+        return alert
+
+    def remove(self, alert_id):
+        """Delete an alert, returns it or None if there is no such alert"""
+        alert = self.alerts.pop(alert_id, None)
+        if alert is None:
+            return None
+        index = self._levels if alert['kind'] == 'level' else self._moves
+        entries = index.get(alert['token'], [])
+        position = bisect_left(entries, (alert['threshold'], alert_id))
+        if position < len(entries) and entries[position][1] == alert_id:
+            del entries[position]
+        return alert
+
+    def user_alerts(self, user_id):
+        return [alert for alert in self.alerts.values() if alert['user_id'] == user_id]
+
+    def last_price(self, token_type):
+        return self._last_price.get(token_type)
+
+    def check(self, token_type, ts, price):
+        """
+        Fold in a new price and pop the alerts it triggers
+
+        Returns:
+            list: (alert, price, move percent) for every alert that fired
+        """
+        previous = self._last_price.get(token_type)
+        self._last_price[token_type] = price
+
+        window = self._window.setdefault(token_type, deque())
+        window.append((ts, price))
+        while window[0][0] < ts - settings.ALERT_MOVE_WINDOW:
+            window.popleft()
+        reference = window[0][1]
+        move = abs(price / reference - 1) * 100 if reference > 0 else 0.0
+
+        fired_ids = []
+
+        # Levels crossed between the previous and current price
+        levels = self._levels.get(token_type)
+        if levels and previous is not None and price != previous:
+            if price > previous:
+                lo = bisect_right(levels, (previous, math.inf))
+                hi = bisect_right(levels, (price, math.inf))
+            else:
+                lo = bisect_left(levels, (price, -math.inf))
+                hi = bisect_left(levels, (previous, -math.inf))
+            fired_ids.extend(alert_id for _, alert_id in levels[lo:hi])
+            del levels[lo:hi]
+
+        # Move thresholds at or below the current move
+        moves = self._moves.get(token_type)
+        if moves:
+            hi = bisect_right(moves, (move, math.inf))
+            fired_ids.extend(alert_id for _, alert_id in moves[:hi])
+            del moves[:hi]
+
+        return [(self.alerts.pop(alert_id), price, move) for alert_id in fired_ids]
+
+engine = AlertEngine(settings.ALERTS_FILE.format(ticker=settings.BOT_CLIENTS[0]['ticker']))
+
+def format_price(price):
+    return f"${price:.6g}"
+
+def describe(alert):
+    symbol = settings.TOKENS[alert['token']]['symbol']
+    if alert['kind'] == 'level':
+        return f"{symbol} crosses {format_price(alert['threshold'])}"
+    return f"{symbol} moves {alert['threshold']:g}% within {settings.ALERT_MOVE_WINDOW // 60} minutes"
+
+async def notify(bots, fired):
+    """Post fired alerts, one message (or as few as fit) per channel, via whichever bot sees it"""
+    by_channel = {}
+    for alert, price, move in fired:
+        symbol = settings.TOKENS[alert['token']]['symbol']
+        if alert['kind'] == 'level':
+            line = f"🔔 <@{alert['user_id']}> {symbol} crossed {format_price(alert['threshold'])} (now {format_price(price)})"
+        else:
+            line = f"🔔 <@{alert['user_id']}> {symbol} moved {move:.2f}% in the last {settings.ALERT_MOVE_WINDOW // 60} minutes (now {format_price(price)})"
+        by_channel.setdefault(alert['channel_id'], []).append(line)
+
+    async def send(channel_id, lines):
+        channel = next(filter(None, (bot.get_channel(channel_id) for bot in bots)), None)
+        if channel is None:
+            return
+        message = ""
+        try:
+            for line in lines:
+                if len(message) + len(line) + 1 > 2000:
+                    await channel.send(message)
+                    message = ""
+                message += line + "\n"
+            if message:
+                await channel.send(message)
+        except discord.HTTPException as e:
+            print(f"Error sending alerts to channel {channel_id}: {str(e)}")
+
+    await asyncio.gather(*(send(channel_id, lines) for channel_id, lines in by_channel.items()))
+
+class AlertCommands(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command(name='alert')
+    async def alert_command(self, ctx, token_type: str = None, threshold: str = None):
+        """Set a price alert: !alert tetsuo 0.005 or !alert tetsuo 5%"""
+        token_names = ', '.join(f"'{name}'" for name in settings.TOKENS)
+        if not token_type or not threshold:
+            await ctx.send("❌ Usage: `!alert <token> <price>` or `!alert <token> <percent>%`")
+            return
+        token_type = token_type.lower()
+        if token_type not in settings.TOKENS:
+            await ctx.send(f"❌ Invalid token type. Please use one of: {token_names}.")
+            return
+
+        kind = 'move' if threshold.endswith('%') else 'level'
+        try:
+            value = abs(float(threshold.rstrip('%').lstrip('$+')))
+        except ValueError:
+            value = 0
+        if not value or not math.isfinite(value):
+            await ctx.send("❌ Please give a price like `0.005` or a percentage like `5%`.")
+            return
+        if len(engine.user_alerts(ctx.author.id)) >= settings.ALERT_MAX_PER_USER:
+            await ctx.send(f"❌ You already have {settings.ALERT_MAX_PER_USER} alerts. Remove one with `!unalert <id>`.")
+            return
+
+        alert = engine.add(token_type, kind, value, ctx.channel.id, ctx.author.id)
+        await engine.save()
+        await ctx.send(f"✅ Alert #{alert['id']} set: {describe(alert)}")
+
+    @commands.command(name='alerts')
+    async def alerts_command(self, ctx):
+        """List your price alerts"""
+        alerts = engine.user_alerts(ctx.author.id)
+        if not alerts:
+            await ctx.send("You have no price alerts. Set one with `!alert <token> <price>`.")
+            return
+        lines = [f"#{alert['id']}: {describe(alert)}" for alert in sorted(alerts, key=lambda alert: alert['id'])]
+        await ctx.send("Your price alerts:\n" + "\n".join(lines))
+
+    @commands.command(name='unalert')
+    async def unalert_command(self, ctx, alert_id: int = None):
+        """Remove one of your price alerts"""
+        alert = engine.alerts.get(alert_id)
+        if alert is None or alert['user_id'] != ctx.author.id:
+            await ctx.send("❌ No alert with that id. See your alerts with `!alerts`.")
+            return
+        engine.remove(alert_id)
+        await engine.save()
+        await ctx.send(f"🗑️ Removed alert #{alert_id}: {describe(alert)}")
@@ -1,253 +1,404 @@
 # By Alternating
 
+import startup
+startup.time_imports()
+
 import discord
 from discord.ext import tasks, commands
-import requests
 import asyncio
+import io
+import math
 import os
+import sys
+import time
 from datetime import datetime
 import settings
-from chart_scraper import capture_chart_async
-import yfinance as yf
+import http_client
+import quote_cache
+import quote_providers
+import chart_jobs
+import chart_cache
+import prerender
+import charts
+import price_store
+import sparkline
+import presence
+import poll_schedule
+import rate_limit
+import alerts
+import quote_bus
 from dotenv import load_dotenv
 from help import HelpCommands
 
 class PriceBot(commands.Bot):
-    def __init__(self):
+    """
+    One Discord client showing a token's price in its nickname. Several can
+    run on one loop: the first (primary) polls prices and owns the shared
+    services, the others (peers) get their nickname pushed on its ticks.
+    """
+
+    def __init__(self, ticker='tetsuo', primary=None, commands_enabled=True):
         intents = discord.Intents.default()
         intents.message_content = True
         super().__init__(command_prefix='!', intents=intents, help_command=None)  # Added help_command=None
         
-        # Initialize command cooldowns
-        self.command_cooldowns = {}
+        self.ticker = ticker
+        self.primary = primary or self
+        self.peers = []
+        self.commands_enabled = commands_enabled
+        self.presence = presence.PresenceUpdater(self)
+        self.price_commands = PriceCommands(self)
+        if self.is_primary:
+            self.poll_schedule = poll_schedule.PollScheduler()
+            self.prerenderer = prerender.Prerenderer(self.price_commands.capture_chart)
+        else:
+            self.poll_schedule = primary.poll_schedule
+            self.prerenderer = primary.prerenderer
+            primary.peers.append(self)
+        self.quote_bus = None
+        self._bus_deadline = 0.0  # Monotonic time after which the bus counts as silent
+        self.charts_ready = False
+        self._chart_backend = None
+
+    @property
+    def is_primary(self):
+        return self.primary is self
         
     async def setup_hook(self):
-        await self.add_cog(PriceCommands(self))
-        await self.add_cog(HelpCommands(self))  # Add the new help cog
-        self.update_price.start()
+        startup.mark(f'{self.ticker} setup_hook')
+        if self.commands_enabled:
+            await self.add_cog(self.price_commands)
+            for token_type in settings.TOKENS:
+                self.add_command(self.price_commands.make_price_command(token_type))
+            await self.add_cog(HelpCommands(self))  # Add the new help cog
+            await self.add_cog(alerts.AlertCommands(self))
+        if not self.is_primary:
+            return  # Shared services are started and fed by the primary
+        await http_client.get_session()
+        loop = asyncio.get_running_loop()
+        for token_type in settings.TOKENS:
+            await loop.run_in_executor(None, charts.load_history, token_type)
+        # Bot processes sharing a quote bus each keep their own alerts file,
+        # so one process never rewrites alerts another one created
+        alerts.engine.path = settings.ALERTS_FILE.format(ticker=self.ticker)
+        await loop.run_in_executor(None, alerts.engine.load)
+        if settings.QUOTE_BUS:
+            # Prices arrive from ingest.py; until the first tick, and once
+            # ticks stop, quotes are fetched upstream as usual
+            self.quote_bus = quote_bus.QuoteBusClient(settings.QUOTE_BUS_PATH, self.on_quote_tick)
+            self.quote_bus.start()
+            self._bus_deadline = time.monotonic() + settings.QUOTE_BUS_STALE_TICKS * settings.PRICE_COOLDOWN
+            self.watch_quote_bus.start()
+        else:
+            self.update_price.start()
+
+    async def close(self):
+        if self.is_primary:
+            if self.quote_bus is not None:
+                self.watch_quote_bus.cancel()
+                await self.quote_bus.close()
+            await self.prerenderer.close()
+            await chart_jobs.scheduler.close()
+            if self._chart_backend is not None:
+                self._chart_backend.cancel()
+            if settings.CHART_RENDERER != 'native' and 'chart_scraper' in sys.modules:
+                import browser_pool
+                import chart_scraper
+                await chart_scraper.live_tabs.close()
+                await browser_pool.pool.close()
+            charts.shutdown()
+            price_store.store.close()
+            await http_client.close()
+        await super().close()
+
+    async def on_raw_message_delete(self, payload):
+        # Drop queued chart jobs whose requesting message is gone
+        chart_jobs.scheduler.cancel(payload.message_id)
+
+    async def on_guild_remove(self, guild):
+        self.presence.forget_guild(guild.id)
 
     async def on_ready(self):
         print(f'Logged in as {self.user.name} ({self.user.id})')
         print('------')
+        startup.mark(f'{self.ticker} ready')
+        if self.is_primary and self._chart_backend is None:
+            # Connect first, then load the chart renderer in the background
+            self._chart_backend = asyncio.create_task(self.start_chart_backend())
+
+    async def start_chart_backend(self):
+        """Start the render workers, or the browser pool and its live tabs, ahead of the first !chart"""
+        if settings.CHART_RENDERER == 'native':
+            try:
+                await charts.warm_up()
+                self.charts_ready = True
+            except Exception as e:
+                print(f'Error starting chart workers: {str(e)}')
+        else:
+            try:
+                import browser_pool
+                import chart_scraper
+                await browser_pool.pool.start()
+                if settings.CHART_LIVE_TABS:
+                    await chart_scraper.live_tabs.start()
+                self.charts_ready = True
+            except Exception as e:
+                print(f'Error starting browser pool: {str(e)}')
+        startup.mark('chart backend')
 
     @tasks.loop(seconds=settings.PRICE_COOLDOWN)
     async def update_price(self):
         """Update bot's nickname with current price"""
         try:
-            # Fetch TETSUO price data
-            response = requests.get(settings.TETSUO['dex_api'])
-            data = response.json()
-            
-            if data and 'pairs' in data and len(data['pairs']) > 0:
-                pair = data['pairs'][0]
-                price = float(pair['priceUsd'])
-                price = price * 1000
-                price_change = float(pair['priceChange']['h24']) if 'priceChange' in pair else 0
-                
-                # Format nickname with arrow
-                arrow = "↗" if price_change >= 0 else "↘"
-                new_name = f"EngageXD {price:.1f}M {arrow}"
+            if self.quote_bus is None:
+                await self.record_samples()
+            # else ingest.py owns the price history, polling here only while
+            # the bus is silent keeps nicknames and status current
+            await self.push_prices()
 
-		#arrow = "↗" if price_change >= 0 else "↘"
-	#price = price * 1000
-	#new_name = f"EngageXD {price:.1f}M {arrow}"
+            # Poll faster while prices move or commands are busy
+            interval = self.poll_schedule.next_interval()
+            if interval != self.update_price.seconds:
+                self.update_price.change_interval(seconds=interval)
+                print(f'Next price poll in {interval:.0f}s (activity {self.poll_schedule.activity():.2f})')
 
-                # Update bot's nickname in all guilds
-                for guild in self.guilds:
-                    try:
-                        await guild.me.edit(nick=new_name)
-                        print(f'Updated price to {new_name}')
-                    except discord.errors.Forbidden:
-                        print(f'Missing permissions to change nickname in {guild.name}')
-                
-                # Update bot's status based on price change
-                status = discord.Status.online if price_change >= 0 else discord.Status.dnd
-                activity = discord.CustomActivity(name=f"24hr| {price_change:+.2f}%")
-                await self.change_presence(status=status, activity=activity)
+            self.after_tick(self.update_price.seconds)
                 
         except Exception as e:
             print(f'Error updating price: {str(e)}')
 
+    async def on_quote_tick(self, message):
+        """Apply a tick published by ingest.py in place of polling"""
+        interval = message.get('interval', settings.PRICE_COOLDOWN)
+        # Bus entries last a few ticks, so they age out if ingest.py goes away;
+        # upstream fetches made meanwhile keep the normal QUOTE_TTL
+        ttl = max(settings.QUOTE_TTL, settings.QUOTE_BUS_STALE_TICKS * interval)
+        self._bus_deadline = time.monotonic() + ttl
+        if self.update_price.is_running():
+            print('Quote bus ticks resumed, stopping direct price polling')
+            self.update_price.stop()
+        fired = []
+        for token_type, data in message['tokens'].items():
+            if token_type not in settings.TOKENS:
+                continue
+            quote_cache.put_pair(token_type, data.get('pair'), ttl)
+            quote_providers.put_quote(token_type, data.get('quote'), ttl)
+            if data.get('sample'):
+                fired.extend(self.apply_sample(token_type, data['sample']))
+        await self.notify_alerts(fired)
+        await self.push_prices()
+        self.after_tick(interval)
+
+    @tasks.loop(seconds=settings.QUOTE_BUS_WATCHDOG)
+    async def watch_quote_bus(self):
+        """Poll prices directly while ingest.py has missed several ticks"""
+        if time.monotonic() > self._bus_deadline and not self.update_price.is_running():
+            print('No quote bus ticks, polling prices directly until they resume')
+            self.update_price.start()
+
+    async def push_prices(self):
+        """Push the price to this bot's and every ready peer's nickname and status"""
+        bots = [bot for bot in [self] + self.peers if bot.is_ready()]
+        results = await asyncio.gather(*(bot.push_price() for bot in bots), return_exceptions=True)
+        for bot, result in zip(bots, results):
+            if isinstance(result, Exception):
+                print(f'Error updating {bot.ticker} ticker: {str(result)}')
+
+    async def push_price(self):
+        """Show the ticker token's price in the nickname and its 24h change in the status"""
+        # Fetch price data, falling back to other sources or the last good quote
+        quote = await quote_providers.get_quote(self.ticker)
+        
+        if quote:
+            token = settings.TOKENS[self.ticker]
+            price = quote['price']
+            price = price * token['nickname_scale']
+            price_change = quote['change_24h']
+            
+            # Format nickname with arrow
+            arrow = "↗" if price_change >= 0 else "↘"
+            new_name = token['nickname_format'].format(value=price, arrow=arrow)
+
+	#arrow = "↗" if price_change >= 0 else "↘"
+	#price = price * 1000
+	#new_name = f"EngageXD {price:.1f}M {arrow}"
+
+            # Update bot's nickname in all guilds where it changed
+            await self.presence.update_nicknames(new_name)
+            
+            # Update bot's status based on price change
+            status = discord.Status.online if price_change >= 0 else discord.Status.dnd
+            await self.presence.update_presence(status, f"24hr| {price_change:+.2f}%")
+
+            if startup.mark('first nickname'):
+                startup.report()
+                startup.stop_timing_imports()
+
+    def after_tick(self, interval):
+        # Keep popular charts warm, lined up with the price tick
+        if self.charts_ready:
+            self.prerenderer.schedule(interval)
+
+        print(f'Quote cache: {quote_cache.quotes.stats()}')
+        print(f'Chart cache: {chart_cache.cache.stats()}')
+
+    def record_demand(self):
+        """Count a command towards polling demand, here or in the ingestion service"""
+        if not self.is_primary:
+            self.primary.record_demand()
+        elif self.quote_bus is not None:
+            self.quote_bus.send_demand()
+        else:
+            self.poll_schedule.record_demand()
+
+    async def record_samples(self):
+        """Append the latest price and volume of each token to the local price history and check alerts"""
+        pairs = await quote_cache.get_pairs()
+        fired = []
+        for token_type, pair in pairs.items():
+            try:
+                if pair:
+                    sample = price_store.store.record(token_type, pair)
+                    if sample:
+                        fired.extend(self.apply_sample(token_type, sample))
+            except Exception as e:
+                print(f'Error recording {token_type} sample: {str(e)}')
+        await self.notify_alerts(fired)
+
+    def apply_sample(self, token_type, sample):
+        """Feed a recorded sample to candles, the poll scheduler and alerts, returns fired alerts"""
+        ts, price, volume = sample
+        charts.record_sample(token_type, ts, price, volume)
+        self.poll_schedule.record_price(token_type, ts, price)
+        return alerts.engine.check(token_type, ts, price)
+
+    async def notify_alerts(self, fired):
+        if fired:
+            await alerts.notify([self] + self.peers, fired)
+            await alerts.engine.save()
+
     @update_price.before_loop
     async def before_update_price(self):
         await self.wait_until_ready()
 
+MARKET_CAP_UNITS = {'M': 1_000_000, 'B': 1_000_000_000}
+
 class PriceCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    async def check_cooldown(self, ctx, command_type='price'):
-        """Check if command is on cooldown"""
-        current_time = datetime.now()
-        cooldown_key = f"{ctx.channel.id}_{command_type}"
-    
-        if cooldown_key in self.bot.command_cooldowns:
-            time_diff = (current_time - self.bot.command_cooldowns[cooldown_key]).total_seconds()
-            # Use different cooldown times for different commands
-            cooldown = settings.CHART_COOLDOWN if command_type == 'chart' else settings.PRICE_COOLDOWN
-            if time_diff < cooldown:
-                remaining = int(cooldown - time_diff)
-                await ctx.send(f'⏳ This command is on cooldown. Please wait {remaining} seconds.')
-                return False
-            
-        self.bot.command_cooldowns[cooldown_key] = current_time
-        return True
+    async def check_cooldown(self, ctx, policy='price', name=None):
+        """Check the command's rate limit, telling the caller once per cooldown"""
+        allowed, retry_after, notify = rate_limit.limiter.hit(ctx, policy, name)
+        if allowed:
+            return True
+        if notify:
+            await ctx.send(f'⏳ This command is on cooldown. Please wait {math.ceil(retry_after)} seconds.')
+        return False
 
-    @commands.command(name='tetsuo')
-    async def tetsuo_price(self, ctx):
-        """Display current TETSUO price information"""
-        if not await self.check_cooldown(ctx, 'tetsuo'):
-            return
-            
-        try:
-            response = requests.get(settings.TETSUO['dex_api'])
-            data = response.json()
-            
-            if data and 'pairs' in data and len(data['pairs']) > 0:
-                pair = data['pairs'][0]
-                price = float(pair['priceUsd'])
-                price_change = float(pair['priceChange']['h24']) if 'priceChange' in pair else 0
-                market_cap = float(pair['fdv']) if 'fdv' in pair else None
-                volume_24h = float(pair['volume']['h24']) if 'volume' in pair and 'h24' in pair['volume'] else None
-                
-                # Create embed
-                color = 0x00ff00 if price_change >= 0 else 0xff0000
-                arrow = "↑" if price_change >= 0 else "↓"
-                
+    def make_price_command(self, token_type):
+        """Build the !<token> price command for a registry token"""
+        async def price_command(ctx):
+            await self.token_price(ctx, token_type)
+        name = settings.TOKENS[token_type]['name']
+        return commands.Command(price_command, name=token_type, help=f"Display current {name} price information")
 
-                embed = discord.Embed(
-                    title="TETSUO Price Information",
-                    url="https://dexscreener.com/solana/2kb3i5ulkhucjuwq3poxhpuggqbwywttk5eg9e5wnlg6",
-                    color=color,
-                    timestamp=datetime.now()
-                )
-                
-                # First row: Price and 24h Change
-                embed.add_field(
-                    name="Current Price",
-                    value=f"{arrow} ${price:.4f}",
-                    inline=True
-                )
-                
-                embed.add_field(
-                    name="24h Change",
-                    value=f"{price_change:+.2f}%",
-                    inline=True
-                )
-                
-                # Add empty field to force next row
-                embed.add_field(name="\u200b", value="\u200b", inline=True)
-                
-                # Second row: Market Cap and Volume
-                if market_cap:
-                    market_cap_formatted = f"${market_cap/1_000_000:.2f}M"
-                    embed.add_field(
-                        name="Market Cap",
-                        value=market_cap_formatted,
-                        inline=True
-                    )
-                else:
-                    embed.add_field(name="Market Cap", value="N/A", inline=True)
-
-                if volume_24h:
-                    volume_formatted = f"${volume_24h:,.0f}"
-                    embed.add_field(
-                        name="24h Volume",
-                        value=volume_formatted,
-                        inline=True
-                    )
-                else:
-                    embed.add_field(name="24h Volume", value="N/A", inline=True)
-                
-                # Add empty field to maintain grid
-                embed.add_field(name="\u200b", value="\u200b", inline=True)
-                
-                await ctx.send(embed=embed)
-                
-            else:
-                await ctx.send("❌ Unable to fetch price data")
-                
-        except Exception as e:
-            print(f"Error in tetsuo_price: {str(e)}")
-            await ctx.send("❌ Error fetching price data")
-    
-    @commands.command(name='sol')
-    async def sol_price(self, ctx):
-        """Display current SOL price information"""
-        if not await self.check_cooldown(ctx, 'sol'):
+    async def token_price(self, ctx, token_type):
+        """Display current price information for a registry token"""
+        self.bot.record_demand()
+        if not await self.check_cooldown(ctx, 'price', token_type):
             return
-            
+
+        token = settings.TOKENS[token_type]
         try:
-            # Get SOL data
-            sol = yf.Ticker("SOL-USD")
-            info = sol.info
-            
-            # Use the correct field names from the API
-            price = info.get('regularMarketDayHigh') or info.get('dayHigh')  # Current price
-            prev_close = info.get('previousClose')
-            volume_24h = info.get('volume24Hr')
-            market_cap = info.get('marketCap')
-            
-            # Calculate 24h change percentage
-            price_change = ((price - prev_close) / prev_close) * 100
-            
+            quote = await quote_providers.get_quote(token_type)
+            if not quote:
+                await ctx.send("❌ Unable to fetch price data")
+                return
+
+            price = quote['price']
+            price_change = quote['change_24h']
+            market_cap = quote['market_cap']
+            volume_24h = quote['volume_24h']
+
             # Create embed
             color = 0x00ff00 if price_change >= 0 else 0xff0000
             arrow = "↑" if price_change >= 0 else "↓"
-            
+
             # Create embed with hyperlinked title
             embed = discord.Embed(
-                title="Solana Price Information",
-                url="https://dexscreener.com/osmosis/1960",
+                title=f"{token['name']} Price Information",
+                url=token['url'],
                 color=color,
                 timestamp=datetime.now()
             )
-            
+
             # First row: Price and 24h Change
             embed.add_field(
                 name="Current Price",
-                value=f"{arrow} ${price:.2f}",
+                value=f"{arrow} ${price:.{token['price_decimals']}f}",
                 inline=True
             )
-            
+
             embed.add_field(
                 name="24h Change",
                 value=f"{price_change:+.2f}%",
                 inline=True
             )
-            
+
             # Add empty field to force next row
             embed.add_field(name="\u200b", value="\u200b", inline=True)
-            
+
             # Second row: Market Cap and Volume
-            market_cap_formatted = f"${market_cap/1_000_000_000:.2f}B"
-            embed.add_field(
-                name="Market Cap",
-                value=market_cap_formatted,
-                inline=True
-            )
+            if market_cap:
+                unit = token['market_cap_unit']
+                market_cap_formatted = f"${market_cap / MARKET_CAP_UNITS[unit]:.2f}{unit}"
+                embed.add_field(
+                    name="Market Cap",
+                    value=market_cap_formatted,
+                    inline=True
+                )
+            else:
+                embed.add_field(name="Market Cap", value="N/A", inline=True)
+
+            if volume_24h:
+                volume_formatted = f"${volume_24h:,.0f}"
+                embed.add_field(
+                    name="24h Volume",
+                    value=volume_formatted,
+                    inline=True
+                )
+            else:
+                embed.add_field(name="24h Volume", value="N/A", inline=True)
 
-            volume_formatted = f"${volume_24h:,.0f}"
-            embed.add_field(
-                name="24h Volume",
-                value=volume_formatted,
-                inline=True
-            )
-            
             # Add empty field to maintain grid
             embed.add_field(name="\u200b", value="\u200b", inline=True)
-            
-            await ctx.send(embed=embed)
-                
+
+            await ctx.send(embed=embed, **self.sparkline_attachment(embed, token_type))
+
         except Exception as e:
-            print(f"Error in sol_price: {str(e)}")
-            await ctx.send("❌ Error fetching SOL price data")
+            print(f"Error in {token_type} price: {str(e)}")
+            await ctx.send(f"❌ Error fetching {token['symbol']} price data")
+
+    def sparkline_attachment(self, embed, token_type):
+        """Show the recent price trend as the embed image, returns send() kwargs"""
+        try:
+            data = sparkline.get(token_type)
+        except Exception as e:
+            print(f"Error rendering {token_type} sparkline: {str(e)}")
+            return {}
+        if data is None:
+            return {}
+        filename = f"{token_type}_sparkline.png"
+        embed.set_image(url=f"attachment://{filename}")
+        return {'file': discord.File(io.BytesIO(data), filename=filename)}
 
     @commands.command(name='chart')
     async def chart_command(self, ctx, token_type: str = None, timeframe: str = "1h"):
-        """Display price chart for TETSUO or SOL with specified timeframe"""
+        """Display price chart for a registry token with specified timeframe"""
+        token_names = ', '.join(f"'{name}'" for name in settings.TOKENS)
         if not token_type:
-            await ctx.send("❌ Please specify either 'tetsuo' or 'sol' after the command.")
+            await ctx.send(f"❌ Please specify a token after the command: {token_names}.")
             return
             
         valid_timeframes = ["15m", "30m", "1h", "4h", "1d"]
@@ -256,49 +407,174 @@ class PriceCommands(commands.Cog):
             return
         
         token_type = token_type.lower()
-        if token_type not in ['tetsuo', 'sol']:
-            await ctx.send("❌ Invalid token type. Please use either 'tetsuo' or 'sol'.")
+        if token_type not in settings.TOKENS:
+            await ctx.send(f"❌ Invalid token type. Please use one of: {token_names}.")
+            return
+        
+        if not await self.check_cooldown(ctx, 'chart'):
+            return
+
+        self.bot.prerenderer.record(token_type, timeframe)
+        self.bot.record_demand()
+        
+        # Serve from the chart cache, refreshing stale entries in the background
+        cached = chart_cache.cache.lookup(token_type, timeframe)
+        if cached:
+            entry, fresh = cached
+            await self.send_chart(ctx, token_type, timeframe, entry['data'], entry['captured_at'])
+            if not fresh:
+                self.refresh_chart(token_type, timeframe)
+            return
+        
+        try:
+            job = chart_jobs.scheduler.submit(
+                token_type, timeframe,
+                lambda: self.capture_chart(token_type, timeframe),
+                message_id=ctx.message.id
+            )
+            cancelled = job.waiters[ctx.message.id]
+        except chart_jobs.QueueFullError:
+            await ctx.send("❌ Too many charts are being generated right now. Please try again shortly.")
             return
         
         async with ctx.typing():
             try:
-                status_msg = await ctx.send("📊 Generating chart, please wait...")
+                position = chart_jobs.scheduler.position(job)
+                status_msg = await ctx.send(self.chart_status(position))
+                chart_data = await self.wait_for_chart(job, status_msg, position, cancelled)
             
-                if token_type == 'sol':
-                    # Use SOL-specific scraper
-                    from sol_chart_scraper import capture_sol_chart_async
-                    chart_path = await capture_sol_chart_async(headless=True, timeframe=timeframe)
-                else:
-                    # Use original chart scraper for TETSUO
-                    from chart_scraper import capture_chart_async
-                    chart_path = await capture_chart_async('tetsuo', timeframe) if token_type == 'tetsuo' else await capture_sol_chart_async(timeframe=timeframe)
-            
-                if chart_path is None:
+                if cancelled.done():
+                    # Requesting message was deleted, nothing to answer
+                    await status_msg.delete()
+                    return
+                if chart_data is None:
                     await status_msg.edit(content="❌ Failed to generate chart. Please try again later.")
                     return
             
-                embed = discord.Embed(
-                    title=f"{'TETSUO' if token_type == 'tetsuo' else 'Solana'} Price Chart ({timeframe})",
-                    color=0x00ff00,
-                    timestamp=datetime.now()
-                )
-            
-                file = discord.File(chart_path, filename="chart.png")
-                embed.set_image(url="attachment://chart.png")
-            
-                await ctx.send(file=file, embed=embed)
+                await self.send_chart(ctx, token_type, timeframe, chart_data, datetime.now())
                 await status_msg.delete()
             
+            except asyncio.TimeoutError:
+                chart_jobs.scheduler.cancel(ctx.message.id)
+                await status_msg.edit(content="❌ Chart request timed out in the queue. Please try again later.")
             except Exception as e:
                 await status_msg.edit(content="❌ Failed to generate chart. Please try again later.")
                 print(f"Error in chart command: {str(e)}")
+
+    async def send_chart(self, ctx, token_type, timeframe, data, captured_at):
+        embed = discord.Embed(
+            title=f"{settings.TOKENS[token_type]['name']} Price Chart ({timeframe})",
+            color=0x00ff00,
+            timestamp=captured_at
+        )
+    
+        file = discord.File(io.BytesIO(data), filename="chart.png")
+        embed.set_image(url="attachment://chart.png")
+    
+        await ctx.send(file=file, embed=embed)
+
+    def refresh_chart(self, token_type, timeframe, priority=1):
+        """Queue a background capture that only updates the chart cache"""
+        try:
+            chart_jobs.scheduler.submit(
+                token_type, timeframe,
+                lambda: self.capture_chart(token_type, timeframe),
+                priority=priority
+            )
+        except chart_jobs.QueueFullError:
+            pass
+
+    @staticmethod
+    def chart_status(position):
+        if position > 1:
+            return f"📊 Chart queued (position {position}), please wait..."
+        return "📊 Generating chart, please wait..."
+
+    async def wait_for_chart(self, job, status_msg, position, cancelled):
+        """
+        Wait for a chart job, keeping the queue position in the status message
+        current; returns None early once the request's cancel signal is set
+        """
+        deadline = asyncio.get_running_loop().time() + settings.CHART_QUEUE_TIMEOUT
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            done, _ = await asyncio.wait(
+                {job.future, cancelled}, timeout=min(remaining, settings.CHART_QUEUE_POLL),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if cancelled in done:
+                return None
+            if done:
+                return None if job.future.cancelled() else job.future.result()
+            new_position = chart_jobs.scheduler.position(job)
+            if new_position != position:
+                position = new_position
+                await status_msg.edit(content=self.chart_status(position))
+
+    async def capture_chart(self, token_type, timeframe):
+        """
+        Run one chart capture, called from the chart scheduler
+
+        Returns:
+            bytes: PNG data, also stored in the chart cache, or None on failure
+        """
+        if settings.CHART_RENDERER == 'native':
+            # Render from candle data in the chart worker processes
+            data = await charts.create_price_chart(token_type, timeframe)
+        else:
+            data = await self.scrape_chart(token_type, timeframe)
+
+        if data is None:
+            return None
+        chart_cache.cache.store(token_type, timeframe, data)
+        return data
+
+    async def scrape_chart(self, token_type, timeframe):
+        # Playwright loads on first use, normally already done by the background warm-up
+        import chart_scraper
+        return await chart_scraper.capture_chart_async(token_type, timeframe)
             
+async def run_clients(clients):
+    """Run one PriceBot per (client config, bot token) on the current loop"""
+    bots = []
+    for client, _ in clients:
+        bots.append(PriceBot(client['ticker'], primary=bots[0] if bots else None,
+                             commands_enabled=client.get('commands', True)))
+    tasks = [asyncio.ensure_future(bot.start(token)) for bot, (_, token) in zip(bots, clients)]
+    try:
+        # Peers are fed by the primary's poller, so a primary that fails
+        # to log in or disconnects for good takes every client down with it
+        await asyncio.wait([tasks[0]])
+    finally:
+        # Peers first, the primary owns the shared services
+        for bot in reversed(bots):
+            if not bot.is_closed():
+                await bot.close()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for bot, result in zip(bots, results):
+            if isinstance(result, Exception):
+                print(f"Error running {bot.ticker} bot: {str(result)}")
+
 def main():
     load_dotenv()
-    settings.BOT_TOKEN = os.getenv('DISCORD_TOKEN')
+    clients = []
+    for client in settings.BOT_CLIENTS:
+        token = os.getenv(client['env'])
+        if token:
+            clients.append((client, token))
+        else:
+            print(f"No bot token in {client['env']}, skipping the {client['ticker']} ticker")
+    if not clients:
+        print("Error starting bot: no bot tokens configured")
+        return
+    settings.BOT_TOKEN = clients[0][1]
+    discord.utils.setup_logging()
     try:
-        bot = PriceBot()
-        bot.run(settings.BOT_TOKEN)
+        asyncio.run(run_clients(clients))
+    except KeyboardInterrupt:
+        pass
     except Exception as e:
         print(f"Error starting bot: {str(e)}")
 
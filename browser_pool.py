@@ -0,0 +1,201 @@
+import asyncio
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+import settings
+import cmc_session
+
+LAUNCH_ARGS = ['--disable-blink-features=AutomationControlled']
+
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'screen': {'width': 1920, 'height': 1080},
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+def context_options():
+    """Context options, including the saved CMC storage state when there is one"""
+    options = dict(CONTEXT_OPTIONS)
+    state = cmc_session.load_state()
+    if state:
+        options['storage_state'] = state
+    return options
+
+class BrowserPool:
+    """Long-lived Chromium that hands out pre-warmed contexts and pages"""
+
+    def __init__(self, warm_pages=None, max_uses=None, headless=True):
+        self.warm_pages = settings.BROWSER_WARM_PAGES if warm_pages is None else warm_pages
+        self.max_uses = settings.BROWSER_MAX_USES if max_uses is None else max_uses
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        self._uses = 0
+        self._active = {}  # browser -> number of leased pages, long-lived ones included
+        self._pages = {}   # context from open_page() -> its browser
+        self._warm = []    # (browser, context, page) ready to hand out
+        self._lock = asyncio.Lock()
+        self._refill_task = None
+
+    @property
+    def running(self):
+        return self._playwright is not None
+
+    async def start(self):
+        """Start Playwright, launch Chromium and pre-warm pages"""
+        if self.running:
+            return
+        self._playwright = await async_playwright().start()
+        async with self._lock:
+            await self._launch()
+        await self._refill()
+        print(f"Browser pool started with {len(self._warm)} warm pages")
+
+    async def close(self):
+        """Close every context, browser and the Playwright driver"""
+        if self._refill_task:
+            self._refill_task.cancel()
+            self._refill_task = None
+        for _, context, _ in self._warm:
+            await self._safe_close(context)
+        self._warm.clear()
+        for browser in list(self._active):
+            await self._safe_close(browser)
+        self._active.clear()
+        self._pages.clear()
+        self._browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self):
+        """Launch a fresh browser, retiring the current one once it drains"""
+        old = self._browser
+        self._browser = await self._playwright.chromium.launch(
+            headless=self.headless,
+            args=LAUNCH_ARGS
+        )
+        self._active[self._browser] = 0
+        self._uses = 0
+
+        # Warm pages from the old browser would keep it alive, drop them
+        stale = [entry for entry in self._warm if entry[0] is old]
+        self._warm = [entry for entry in self._warm if entry[0] is not old]
+        for _, context, _ in stale:
+            await self._safe_close(context)
+        if old is not None:
+            await self._retire(old)
+
+    async def _retire(self, browser):
+        """Close a browser that is no longer current and has no leases"""
+        if browser is not self._browser and self._active.get(browser, 0) == 0:
+            self._active.pop(browser, None)
+            await self._safe_close(browser)
+
+    async def ensure_healthy(self):
+        """Relaunch when the browser crashed or has hit its use limit"""
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected():
+                print("Browser pool: browser is not connected, relaunching...")
+                await self._launch()
+            elif self.max_uses and self._uses >= self.max_uses:
+                print(f"Browser pool: recycling browser after {self._uses} uses")
+                await self._launch()
+
+    async def _new_page(self):
+        browser = self._browser
+        context = await browser.new_context(**context_options())
+        page = await context.new_page()
+        return browser, context, page
+
+    async def _refill(self):
+        """Top the warm list back up to warm_pages"""
+        while self.running and len(self._warm) < self.warm_pages:
+            try:
+                self._warm.append(await self._new_page())
+            except Exception as e:
+                print(f"Browser pool: failed to warm page: {str(e)}")
+                return
+
+    def _schedule_refill(self):
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _take(self):
+        """Pop a healthy warm page or open a new one"""
+        while self._warm:
+            browser, context, page = self._warm.pop()
+            if browser is self._browser and browser.is_connected() and not page.is_closed():
+                return browser, context, page
+            await self._safe_close(context)
+        return await self._new_page()
+
+    async def open_page(self):
+        """
+        Open a long-lived page in its own context. It holds a lease on its
+        browser, so a recycled browser stays up until close_page() releases it.
+        """
+        await self.ensure_healthy()
+        browser, context, page = await self._new_page()
+        self._active[browser] = self._active.get(browser, 0) + 1
+        self._pages[context] = browser
+        return context, page
+
+    async def close_page(self, context):
+        """Close a page from open_page() and release its lease"""
+        await self._safe_close(context)
+        browser = self._pages.pop(context, None)
+        if browser in self._active:
+            self._active[browser] -= 1
+            await self._retire(browser)
+
+    def is_current(self, context):
+        """False once the browser behind an open_page() context has been replaced"""
+        return self._pages.get(context) is self._browser
+
+    def record_use(self):
+        """Count a capture made on a long-lived page towards recycling"""
+        self._uses += 1
+
+    @asynccontextmanager
+    async def page(self):
+        """Lease a page in its own context, closed again after use"""
+        await self.ensure_healthy()
+        browser, context, page = await self._take()
+        self._uses += 1
+        self._active[browser] = self._active.get(browser, 0) + 1
+        try:
+            yield page
+        finally:
+            await self._safe_close(context)
+            if browser in self._active:
+                self._active[browser] -= 1
+                await self._retire(browser)
+            self._schedule_refill()
+
+    @staticmethod
+    async def _safe_close(target):
+        try:
+            await target.close()
+        except Exception:
+            pass
+
+pool = BrowserPool()
+
+@asynccontextmanager
+async def page(headless=True):
+    """
+    Lease a page from the shared pool, or launch a one-off browser when the
+    pool is not running (scripts, debugging with headless=False)
+    """
+    if pool.running and headless:
+        async with pool.page() as leased:
+            yield leased
+        return
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless, args=LAUNCH_ARGS)
+        try:
+            context = await browser.new_context(**context_options())
+            yield await context.new_page()
+        finally:
+            await browser.close()
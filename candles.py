@@ -0,0 +1,182 @@
+import math
+import numpy as np
+import settings
+import price_store
+
+COLUMNS = ('ts', 'open', 'high', 'low', 'close', 'volume', 'sma', 'ema', 'vwap', 'rsi')
+
+class CandleSeries:
+    """
+    OHLCV candles for one (token, timeframe) with SMA, EMA, VWAP and RSI,
+    updated in O(1) per tick. Candles live in fixed-size NumPy ring arrays;
+    the last slot is the candle still forming and is rewritten on each tick,
+    while running sums for closed candles are only advanced when a candle
+    closes.
+    """
+
+    def __init__(self, step, capacity=None, sma_period=None, ema_period=None, rsi_period=None):
+        self.step = step
+        self.capacity = settings.CANDLE_CAPACITY if capacity is None else capacity
+        self.sma_period = settings.SMA_PERIOD if sma_period is None else sma_period
+        self.ema_alpha = 2 / ((settings.EMA_PERIOD if ema_period is None else ema_period) + 1)
+        self.rsi_period = settings.RSI_PERIOD if rsi_period is None else rsi_period
+        self.data = {column: np.full(self.capacity, np.nan) for column in COLUMNS}
+        self.count = 0           # Candles ever opened, the forming one included
+        self.bucket = None       # Open time of the forming candle
+
+        # State as of the last closed candle
+        self._closed_sum = 0.0   # Sum of the last sma_period - 1 closes
+        self._ema = None
+        self._prev_close = None
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self._rsi_count = 0
+        self._vwap_day = None
+        self._cum_pv = 0.0
+        self._cum_v = 0.0
+
+    def _slot(self, index):
+        return index % self.capacity
+
+    def update(self, ts, price, volume=0.0):
+        """Fold one price sample into the candles and indicators"""
+        bucket = math.floor(ts / self.step) * self.step
+        if self.bucket is not None and bucket < self.bucket:
+            return  # Out-of-order sample for a candle that already closed
+
+        d = self.data
+        if bucket != self.bucket:
+            if self.bucket is not None:
+                self._close_candle()
+            self.bucket = bucket
+            i = self._slot(self.count)
+            self.count += 1
+            d['ts'][i] = bucket
+            d['open'][i] = d['high'][i] = d['low'][i] = price
+            d['volume'][i] = 0.0
+        i = self._slot(self.count - 1)
+        if price > d['high'][i]:
+            d['high'][i] = price
+        if price < d['low'][i]:
+            d['low'][i] = price
+        d['close'][i] = price
+        d['volume'][i] += volume
+        self._update_indicators(i)
+
+    def _update_indicators(self, i):
+        """Recompute the forming candle's indicators from closed-candle state"""
+        d = self.data
+        close = d['close'][i]
+
+        # SMA over the last sma_period closes, the forming one included
+        if self.count >= self.sma_period:
+            d['sma'][i] = (self._closed_sum + close) / self.sma_period
+
+        # EMA seeded with the first close
+        d['ema'][i] = close if self._ema is None else self._ema + self.ema_alpha * (close - self._ema)
+
+        # Wilder RSI, simple averages until rsi_period deltas have been seen
+        if self._prev_close is not None:
+            gain, loss = self._rsi_step(close)
+            if self._rsi_count + 1 >= self.rsi_period:
+                d['rsi'][i] = 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+
+        # VWAP anchored to the start of each UTC day
+        typical = (d['high'][i] + d['low'][i] + close) / 3
+        cum_pv, cum_v = self._vwap_base(d['ts'][i])
+        volume = d['volume'][i]
+        if cum_v + volume > 0:
+            d['vwap'][i] = (cum_pv + typical * volume) / (cum_v + volume)
+        else:
+            d['vwap'][i] = typical
+
+    def _rsi_step(self, close):
+        delta = close - self._prev_close
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        if self._rsi_count < self.rsi_period:
+            n = self._rsi_count + 1
+            return (self._avg_gain * self._rsi_count + gain) / n, (self._avg_loss * self._rsi_count + loss) / n
+        n = self.rsi_period
+        return (self._avg_gain * (n - 1) + gain) / n, (self._avg_loss * (n - 1) + loss) / n
+
+    def _vwap_base(self, ts):
+        day = int(ts // 86400)
+        if day != self._vwap_day:
+            return 0.0, 0.0
+        return self._cum_pv, self._cum_v
+
+    def _close_candle(self):
+        """Advance closed-candle state past the forming candle"""
+        d = self.data
+        i = self._slot(self.count - 1)
+        close = d['close'][i]
+
+        self._closed_sum += close
+        if self.count >= self.sma_period:
+            self._closed_sum -= d['close'][self._slot(self.count - self.sma_period)]
+
+        self._ema = d['ema'][i]
+
+        if self._prev_close is not None:
+            self._avg_gain, self._avg_loss = self._rsi_step(close)
+            self._rsi_count += 1
+        self._prev_close = close
+
+        cum_pv, cum_v = self._vwap_base(d['ts'][i])
+        self._vwap_day = int(d['ts'][i] // 86400)
+        typical = (d['high'][i] + d['low'][i] + close) / 3
+        self._cum_pv = cum_pv + typical * d['volume'][i]
+        self._cum_v = cum_v + d['volume'][i]
+
+    def window(self, count):
+        """The last `count` candles, oldest first, as a dict of arrays (copies)"""
+        count = min(count, self.count, self.capacity)
+        end = self.count
+        slots = np.arange(end - count, end) % self.capacity
+        return {column: values[slots] for column, values in self.data.items()}
+
+class CandleBook:
+    """CandleSeries for every token and timeframe, fed from the price poller"""
+
+    def __init__(self, timeframes):
+        self.timeframes = timeframes  # timeframe -> candle length in seconds
+        self._series = {}             # (token, timeframe) -> CandleSeries
+        self._loaded = set()
+
+    def _token_series(self, token_type):
+        for timeframe, step in self.timeframes.items():
+            key = (token_type, timeframe)
+            if key not in self._series:
+                self._series[key] = CandleSeries(step)
+            yield self._series[key]
+
+    def update(self, token_type, ts, price, volume=0.0):
+        for series in self._token_series(token_type):
+            series.update(ts, price, volume)
+
+    def backfill(self, token_type, samples):
+        """
+        Warm candles and indicators from stored samples, once per token.
+        Samples are resampled per timeframe with NumPy and only the candles
+        the ring can hold are replayed, each as open/high/low/close ticks,
+        so the cost is bounded by the ring size rather than the history.
+        """
+        if token_type in self._loaded:
+            return
+        self._loaded.add(token_type)
+        for series in self._token_series(token_type):
+            bars = price_store.resample(samples, series.step)
+            start = max(0, len(bars['ts']) - series.capacity)
+            columns = (bars[key][start:].tolist() for key in ('ts', 'open', 'high', 'low', 'close', 'volume'))
+            for ts, open_, high, low, close, volume in zip(*columns):
+                series.update(ts, open_, volume)
+                series.update(ts, high)
+                series.update(ts, low)
+                series.update(ts, close)
+
+    def loaded(self, token_type):
+        return token_type in self._loaded
+
+    def window(self, token_type, timeframe, count):
+        series = self._series.get((token_type, timeframe))
+        return series.window(count) if series else None
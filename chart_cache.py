@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+import settings
+
+class ChartCache:
+    """
+    Size-bounded LRU of rendered chart PNGs keyed by (token, timeframe).
+    Entries past their timeframe's TTL are still returned, flagged stale, so
+    callers can answer at once and refresh in the background.
+    """
+
+    def __init__(self, ttls=None, max_entries=None, max_bytes=None):
+        self.ttls = settings.CHART_CACHE_TTL if ttls is None else ttls
+        self.max_entries = settings.CHART_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = settings.CHART_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._entries = OrderedDict()  # (token, timeframe) -> entry dict
+        self._bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def lookup(self, token_type, timeframe):
+        """
+        Find a cached chart
+
+        Returns:
+            tuple: (entry, is_fresh), or None on a cold cache. The entry holds
+            'data' (PNG bytes) and 'captured_at' (datetime).
+        """
+        key = (token_type, timeframe)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        fresh = time.monotonic() - entry['stored_at'] < self.ttls.get(timeframe, 0)
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry, fresh
+
+    def age(self, token_type, timeframe):
+        """Seconds since a chart was stored, or None if it isn't cached. Doesn't count as a lookup."""
+        entry = self._entries.get((token_type, timeframe))
+        if entry is None:
+            return None
+        return time.monotonic() - entry['stored_at']
+
+    def store(self, token_type, timeframe, data):
+        key = (token_type, timeframe)
+        old = self._entries.pop(key, None)
+        if old:
+            self._bytes -= len(old['data'])
+        self._entries[key] = {
+            'data': data,
+            'stored_at': time.monotonic(),
+            'captured_at': datetime.now()
+        }
+        self._bytes += len(data)
+        # Evict least recently used entries, always keeping the newest one
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted['data'])
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._bytes
+        }
+
+cache = ChartCache()
@@ -0,0 +1,159 @@
+import asyncio
+import itertools
+import settings
+
+class QueueFullError(Exception):
+    """Raised when the chart queue is at settings.CHART_QUEUE_MAX"""
+
+class ChartJob:
+    """One (token, timeframe) capture shared by every request that asked for it"""
+
+    def __init__(self, key, capture, priority, seq):
+        self.key = key
+        self.capture = capture
+        self.priority = priority
+        self.seq = seq
+        self.future = asyncio.get_running_loop().create_future()
+        self.waiters = {}     # Message id of each waiting request -> its cancel signal future
+        self.background = False  # Submitted without a message, never cancelled for lack of waiters
+        self.task = None      # Set while a worker is running the capture
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class ChartScheduler:
+    """
+    Bounded worker pool for chart captures with a priority queue.
+    Lower priority values run first and equal priorities run FIFO.
+    """
+
+    def __init__(self, max_in_flight=None, max_queue=None, job_timeout=None):
+        if max_in_flight is None:
+            # Native renders are CPU-bound, so allow one per render worker
+            max_in_flight = settings.CHART_RENDER_WORKERS if settings.CHART_RENDERER == 'native' else settings.CHART_MAX_IN_FLIGHT
+        self.max_in_flight = max_in_flight
+        self.max_queue = settings.CHART_QUEUE_MAX if max_queue is None else max_queue
+        self.job_timeout = settings.CHART_JOB_TIMEOUT if job_timeout is None else job_timeout
+        self._queue = None
+        self._jobs = {}      # key -> queued or running job, for deduplication
+        self._pending = []   # queued jobs, for position lookups
+        self._workers = []
+        self._seq = itertools.count()
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        while len(self._workers) < self.max_in_flight:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    def submit(self, token_type, timeframe, capture, message_id=None, priority=0):
+        """
+        Queue a capture, or join an identical one that is already queued or running
+
+        Args:
+            token_type (str): Token to capture
+            timeframe (str): Chart timeframe
+            capture (callable): Coroutine function returning the chart result
+            message_id (int): Requesting message, used for cancellation
+            priority (int): Lower runs first
+
+        Returns:
+            ChartJob: Job whose future resolves to the capture result
+        """
+        self._ensure_workers()
+        key = (token_type, timeframe)
+        job = self._jobs.get(key)
+        if job is None:
+            if len(self._pending) >= self.max_queue:
+                raise QueueFullError()
+            job = ChartJob(key, capture, priority, next(self._seq))
+            self._jobs[key] = job
+            self._pending.append(job)
+            self._queue.put_nowait((job.priority, job.seq, job))
+        elif priority < job.priority and job in self._pending:
+            # A more urgent request joined a background job, queue a new entry
+            # at the better priority; the old one is skipped by the worker
+            job.priority = priority
+            self._queue.put_nowait((job.priority, job.seq, job))
+        if message_id is None:
+            job.background = True
+        elif message_id not in job.waiters:
+            job.waiters[message_id] = asyncio.get_running_loop().create_future()
+        return job
+
+    def position(self, job):
+        """1-based queue position, or 0 once the job is running or done"""
+        if job not in self._pending:
+            return 0
+        return sum(1 for other in self._pending if other < job) + 1
+
+    def cancel(self, message_id):
+        """
+        Drop a request that was deleted or timed out: its cancel signal is set
+        so its own wait ends, and jobs nobody else waits on are cancelled
+        """
+        for job in list(self._jobs.values()):
+            signal = job.waiters.pop(message_id, None)
+            if signal is None:
+                continue
+            if not signal.done():
+                signal.set_result(None)
+            if job.waiters or job.background:
+                continue
+            print(f"Cancelling chart job {job.key}, nobody is waiting for it")
+            job.cancelled = True
+            if job in self._pending:
+                self._pending.remove(job)
+                self._finish(job)
+                job.future.cancel()
+            elif job.task:
+                job.task.cancel()
+
+    def _finish(self, job):
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            if job not in self._pending:
+                continue  # Cancelled or already picked up at another priority
+            self._pending.remove(job)
+            job.task = asyncio.create_task(job.capture())
+            try:
+                result = await asyncio.wait_for(job.task, self.job_timeout)
+                if not job.future.done():
+                    job.future.set_result(result)
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.cancel()
+                if not job.cancelled:
+                    raise  # The worker itself is being shut down
+            except Exception as e:
+                print(f"Chart job {job.key} failed: {str(e) or type(e).__name__}")
+                if not job.future.done():
+                    job.future.set_result(None)
+            finally:
+                self._finish(job)
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        for job in list(self._jobs.values()):
+            if job.task:
+                job.task.cancel()
+            if not job.future.done():
+                job.future.cancel()
+        self._workers.clear()
+        self._jobs.clear()
+        self._pending.clear()
+        self._queue = None
+
+    def stats(self):
+        return {
+            'queued': len(self._pending),
+            'running': sum(1 for job in self._jobs.values() if job.task and not job.task.done())
+        }
+
+scheduler = ChartScheduler()
@@ -0,0 +1,118 @@
+import asyncio
+import time
+import settings
+
+# Hashes a strided sample of every 2d canvas each animation frame and resolves
+# once the hash has not changed for `stableFrames` frames in a row
+CANVAS_STABLE_JS = """
+async ({stableFrames, maxMs}) => {
+    const signature = () => {
+        let hash = 0;
+        for (const canvas of document.querySelectorAll('canvas')) {
+            if (!canvas.width || !canvas.height) continue;
+            const ctx = canvas.getContext('2d');
+            if (!ctx) continue;
+            let data;
+            try {
+                data = ctx.getImageData(0, 0, canvas.width, canvas.height).data;
+            } catch (e) {
+                continue;
+            }
+            for (let i = 0; i < data.length; i += 4 * 97) {
+                hash = (hash * 31 + data[i] + data[i + 1] * 7 + data[i + 2] * 13) | 0;
+            }
+            hash = (hash * 31 + canvas.width * canvas.height) | 0;
+        }
+        return hash;
+    };
+    return await new Promise(resolve => {
+        const start = performance.now();
+        let last = null;
+        let same = 0;
+        const tick = () => {
+            const current = signature();
+            same = current === last ? same + 1 : 0;
+            last = current;
+            if (same >= stableFrames) return resolve(true);
+            if (performance.now() - start > maxMs) return resolve(false);
+            requestAnimationFrame(tick);
+        };
+        requestAnimationFrame(tick);
+    });
+}
+"""
+
+class ChartReadiness:
+    """
+    Decides when a TradingView chart has finished redrawing from real signals:
+    the interval in the chart's aria-label, data requests settling and the
+    canvases no longer changing between frames
+
+    Attach it before triggering the change so the requests it causes are seen.
+    Only requests that start between attaching and shortly after the chart
+    shows the new interval are waited for, so pages that keep polling in the
+    background (and requests already in flight) don't hold the capture up.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self._pending = set()
+        self._last_activity = time.monotonic()
+        self._track_until = None  # Requests starting after this are not the switch's
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_done)
+        page.on("requestfailed", self._on_done)
+
+    def _on_request(self, request):
+        if self._track_until is not None and time.monotonic() > self._track_until:
+            return
+        if request.resource_type in ('xhr', 'fetch'):
+            self._pending.add(request)
+            self._last_activity = time.monotonic()
+
+    def _on_done(self, request):
+        if request in self._pending:
+            self._pending.discard(request)
+            self._last_activity = time.monotonic()
+
+    def detach(self):
+        self.page.remove_listener("request", self._on_request)
+        self.page.remove_listener("requestfinished", self._on_done)
+        self.page.remove_listener("requestfailed", self._on_done)
+
+    async def _network_settled(self):
+        quiet = settings.CHART_READY_NETWORK_QUIET
+        while self._pending or time.monotonic() - self._last_activity < quiet:
+            await asyncio.sleep(0.05)
+
+    async def _wait_all(self, frame, interval_label, timeout):
+        if interval_label:
+            await frame.locator(f"[aria-label$=', {interval_label}']").first.wait_for(timeout=timeout * 1000)
+        self._track_until = time.monotonic() + settings.CHART_READY_TRIGGER_WINDOW
+        await self._network_settled()
+        await frame.evaluate(CANVAS_STABLE_JS, {
+            'stableFrames': settings.CHART_READY_STABLE_FRAMES,
+            'maxMs': timeout * 1000
+        })
+
+    async def wait(self, frame, interval_label=None, timeout=None):
+        """
+        Wait until the chart is ready, falling back after a timeout
+
+        Args:
+            frame (Frame): TradingView iframe
+            interval_label (str): Expected interval text, e.g. '4 hours'
+            timeout (float): Upper bound in seconds, defaults to settings.CHART_READY_TIMEOUT
+
+        Returns:
+            bool: True if every signal fired, False if the timeout was hit
+        """
+        timeout = settings.CHART_READY_TIMEOUT if timeout is None else timeout
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._wait_all(frame, interval_label, timeout), timeout)
+            print(f"Chart ready after {time.monotonic() - started:.2f}s")
+            return True
+        except Exception as e:
+            print(f"Chart readiness fell back after {time.monotonic() - started:.2f}s: {str(e) or type(e).__name__}")
+            return False
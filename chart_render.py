@@ -0,0 +1,172 @@
+# Chart rendering that runs inside the chart worker processes. Kept free of
+# asyncio, Discord and HTTP imports so workers only load what they need;
+# charts.py owns the process pool and the async side.
+import io
+import numpy as np
+import settings
+
+BACKGROUND = '#0B1217'
+
+DATETIME_FORMATS = {
+    '15m': '%m-%d %H:%M',
+    '30m': '%m-%d %H:%M',
+    '1h': '%m-%d %H:%M',
+    '4h': '%m-%d %H:%M',
+    '1d': '%Y-%m-%d'
+}
+
+INDICATOR_COLORS = {
+    'SMA': '#f7c948',
+    'EMA': '#42a5f5',
+    'VWAP': '#ab47bc'
+}
+
+# Axes rectangles (left, bottom, width, height) in figure coordinates,
+# fixed so saving doesn't need a tight-bbox layout pass
+MAIN_RECT = [0.04, 0.30, 0.86, 0.64]
+VOLUME_RECT = [0.04, 0.07, 0.86, 0.21]
+
+# Built once per worker process by get_template()
+_template = None
+
+def init_worker():
+    """Pre-import matplotlib and mplfinance and build the figure template"""
+    import matplotlib
+    matplotlib.use('Agg')
+    get_template()
+
+def make_style():
+    """DexScreener-like mplfinance style"""
+    import mplfinance as mpf
+
+    mc = mpf.make_marketcolors(
+        up='#26a69a',      # Green
+        down='#ef5350',    # Red
+        edge='inherit',
+        wick='inherit',
+        volume={'up': '#26a69a', 'down': '#ef5350'}
+    )
+
+    return mpf.make_mpf_style(
+        base_mpf_style='charles',
+        marketcolors=mc,
+        gridstyle='dotted',
+        gridcolor='#192734',
+        facecolor=BACKGROUND,
+        figcolor=BACKGROUND,
+        rc={
+            'axes.labelcolor': '#A7B1B7',
+            'axes.edgecolor': '#192734',
+            'xtick.color': '#A7B1B7',
+            'ytick.color': '#A7B1B7'
+        }
+    )
+
+def get_template():
+    """
+    The worker's reusable figure: styled once, with fixed price/volume axes
+    and figure-level text artists that survive clearing the axes
+    """
+    global _template
+    if _template is None:
+        import mplfinance as mpf
+
+        fig = mpf.figure(style=make_style(), figsize=(12, 7))
+        ax_main = fig.add_axes(MAIN_RECT)
+        ax_volume = fig.add_axes(VOLUME_RECT, sharex=ax_main)
+        left = MAIN_RECT[0] + 0.01
+        right = MAIN_RECT[0] + MAIN_RECT[2] - 0.01
+        top = MAIN_RECT[1] + MAIN_RECT[3] - 0.01
+        _template = {
+            'fig': fig,
+            'ax_main': ax_main,
+            'ax_volume': ax_volume,
+            'pair': fig.text(left, top, '', color='white', fontweight='bold',
+                             fontsize=12, verticalalignment='top'),
+            'legend': fig.text(left, top - 0.04, '', color='#A7B1B7',
+                               fontsize=9, verticalalignment='top'),
+            'price': fig.text(right, top, '', color='white', fontweight='bold',
+                              fontsize=12, verticalalignment='top',
+                              horizontalalignment='right')
+        }
+    return _template
+
+def indicator_overlays(df, ax):
+    """addplot lines for the indicator columns that have any values"""
+    import mplfinance as mpf
+    overlays = []
+    for column, color in INDICATOR_COLORS.items():
+        if column in df and not np.isnan(df[column].to_numpy()).all():
+            overlays.append(mpf.make_addplot(df[column], ax=ax, color=color, width=1.0))
+    return overlays
+
+def indicator_legend(df):
+    parts = []
+    if 'SMA' in df:
+        parts.append(f"SMA {settings.SMA_PERIOD}")
+    if 'EMA' in df:
+        parts.append(f"EMA {settings.EMA_PERIOD}")
+    if 'VWAP' in df:
+        parts.append("VWAP")
+    if 'RSI' in df and not np.isnan(df['RSI'].iloc[-1]):
+        parts.append(f"RSI {settings.RSI_PERIOD}: {df['RSI'].iloc[-1]:.1f}")
+    return "  ".join(parts)
+
+def format_price(price):
+    # Format price based on value
+    if price < 0.01:
+        return f"${price:.6f}"
+    elif price < 1:
+        return f"${price:.4f}"
+    return f"${price:.2f}"
+
+def render_chart(df, token_type, timeframe='1h'):
+    """
+    Render candles into the worker's figure template
+
+    Returns:
+        bytes: PNG data
+    """
+    import mplfinance as mpf
+
+    template = get_template()
+    fig = template['fig']
+    ax_main = template['ax_main']
+    ax_volume = template['ax_volume']
+
+    # Redraw candles and volume into the existing axes
+    ax_main.clear()
+    ax_volume.clear()
+    overlays = indicator_overlays(df, ax_main)
+    plot_options = {'addplot': overlays} if overlays else {}
+    mpf.plot(
+        df,
+        ax=ax_main,
+        volume=ax_volume,
+        type='candle',
+        ylabel='Price (USD)',
+        ylabel_lower='Volume',
+        xrotation=0,
+        datetime_format=DATETIME_FORMATS.get(timeframe, '%m-%d %H:%M'),
+        show_nontrading=True,
+        **plot_options
+    )
+
+    # Format axes
+    ax_main.tick_params(labelbottom=False)
+    for ax in (ax_main, ax_volume):
+        ax.yaxis.set_label_position('right')
+        ax.yaxis.tick_right()
+
+    # Update the text artists
+    template['pair'].set_text(f"{settings.TOKENS[token_type]['pair_label']} · {timeframe}")
+    template['legend'].set_text(indicator_legend(df))
+    template['price'].set_text(format_price(df['Close'].iloc[-1]))
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer,
+               format='png',
+               dpi=100,
+               facecolor=BACKGROUND,
+               edgecolor='none')
+    return buffer.getvalue()
@@ -1,111 +1,280 @@
-from playwright.async_api import async_playwright
+import asyncio
 import os
 import time
 import settings
+import browser_pool
+import page_router
+import cmc_session
+from chart_ready import ChartReadiness
+
+# CMC chart pages for every registry token that has one
+urls = {name: token['chart_url'] for name, token in settings.TOKENS.items() if token.get('chart_url')}
+
+timeframe_map = {
+    "15m": "15 minutes",
+    "30m": "30 minutes",
+    "1h": "1 hour",
+    "4h": "4 hours",
+    "1d": "1 day"
+}
+
+async def prepare_chart_page(page, token_type: str):
+    """
+    Load the CMC page for a token and bring up the TradingView chart
+
+    Setup clicks only run when the saved storage state didn't already apply
+    them; a failed setup discards the saved state so the next run starts clean.
+
+    Returns:
+        Frame: The TradingView iframe, ready for timeframe switches
+    """
+    try:
+        return await _prepare_chart_page(page, token_type)
+    except Exception:
+        cmc_session.invalidate()
+        raise
+
+async def _prepare_chart_page(page, token_type: str):
+    print("\nNavigating to page...")
+    await page.goto(urls[token_type], wait_until='networkidle', timeout=30000)
+
+    # Saved storage state normally starts us in dark mode on the TradingView chart
+    ran_setup = await cmc_session.enable_dark_mode(page)
+
+    # Some pages (e.g. SOL's) can open on CMC's own chart, switch to TradingView if offered
+    if settings.TOKENS[token_type].get('chart_tradingview_toggle'):
+        ran_setup = await cmc_session.show_tradingview(page) or ran_setup
+
+    print("\nLooking for TradingView iframe...")
+    iframe = await page.wait_for_selector("iframe[name^='tradingview_']", timeout=15000)
+    frame = await iframe.content_frame()
+
+    # Wait for chart elements using exact selectors from codegen
+    print("\nWaiting for chart elements...")
+    await frame.get_by_label(f"Chart for {settings.TOKENS[token_type]['chart_symbol']}, 1 hour").wait_for(timeout=10000)
+    await frame.locator(".price-axis > canvas:nth-child(2)").wait_for(timeout=10000)
+    await frame.locator("div:nth-child(2) > div:nth-child(2) > div > canvas:nth-child(2)").wait_for(timeout=10000)
+
+    # Keep the chart in view so later screenshots don't need to scroll
+    await frame.locator(".chart-widget").first.scroll_into_view_if_needed()
+
+    if ran_setup:
+        await cmc_session.save_state(page.context)
+    return frame
+
+async def set_timeframe(page, frame, timeframe: str):
+    """Switch the TradingView interval and wait for the chart to redraw"""
+    print(f"Setting {timeframe} timeframe...")
+    readiness = ChartReadiness(page)
+    try:
+        await frame.get_by_role("button", name="Time Interval").click()
+        await frame.get_by_text(timeframe_map[timeframe]).click()
+
+        # Wait for the chart to redraw at the new interval
+        await readiness.wait(frame, timeframe_map[timeframe])
+    finally:
+        readiness.detach()
+
+async def screenshot_chart(frame, token_type: str):
+    """Screenshot the chart widget and return the PNG bytes"""
+    print("Taking screenshot...")
+
+    # Get the chart widget and take screenshot
+    chart_widget = frame.locator(".chart-widget").first
+    data = await chart_widget.screenshot()
+
+    print(f"✅ Captured {token_type.upper()} chart ({len(data) / 1024:.0f} KB)")
+    return data
+
+class LiveChartTabs:
+    """Keeps one loaded chart page per token so captures skip navigation and setup"""
+
+    def __init__(self, max_age=None, check_interval=None):
+        self.max_age = settings.LIVE_TAB_MAX_AGE if max_age is None else max_age
+        self.check_interval = settings.LIVE_TAB_CHECK_INTERVAL if check_interval is None else check_interval
+        self._tabs = {}   # token -> tab state dict
+        self._locks = {token: asyncio.Lock() for token in urls}
+        self._refresh_task = None
+
+    @property
+    def running(self):
+        return self._refresh_task is not None and not self._refresh_task.done()
+
+    async def start(self):
+        """Open a tab for every token and start the background refresher"""
+        if self.running:
+            return
+        for token_type in urls:
+            async with self._locks[token_type]:
+                await self._open(token_type)
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        for token_type in list(self._tabs):
+            await self._discard(token_type)
+
+    @staticmethod
+    def _usable(tab):
+        return tab is not None and not tab['crashed'] and not tab['page'].is_closed()
+
+    def _healthy(self, tab):
+        if not self._usable(tab):
+            return False
+        # Tabs on a browser the pool has recycled move to the new one
+        if not browser_pool.pool.is_current(tab['context']):
+            return False
+        return time.monotonic() - tab['loaded_at'] < self.max_age
+
+    async def _open(self, token_type):
+        """(Re)load the tab for a token, caller must hold its lock"""
+        await self._discard(token_type)
+        tab = await self._load(token_type)
+        if tab is not None:
+            self._tabs[token_type] = tab
+
+    async def _load(self, token_type):
+        """Open and prepare a new tab for a token, returns its state or None"""
+        context = None
+        try:
+            context, page = await browser_pool.pool.open_page()
+            tab = {
+                'context': context,
+                'page': page,
+                'route_stats': await page_router.attach(page),
+                'frame': None,
+                'timeframe': '1h',
+                'loaded_at': time.monotonic(),
+                'crashed': False
+            }
+            page.on("crash", lambda _: tab.update(crashed=True))
+            tab['frame'] = await prepare_chart_page(page, token_type)
+            tab['loaded_at'] = time.monotonic()
+            print(f"Live tab ready for {token_type.upper()}")
+            return tab
+        except Exception as e:
+            print(f"Error opening live tab for {token_type}: {str(e)}")
+            if context is not None:
+                await browser_pool.pool.close_page(context)
+            return None
+
+    async def _discard(self, token_type):
+        tab = self._tabs.pop(token_type, None)
+        if tab:
+            await browser_pool.pool.close_page(tab['context'])
+
+    async def _refresh_loop(self):
+        """Reload tabs that went stale, crashed, were closed or sit on a recycled browser"""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await browser_pool.pool.ensure_healthy()
+            except Exception as e:
+                print(f"Error checking browser pool: {str(e)}")
+            for token_type in urls:
+                if self._healthy(self._tabs.get(token_type)):
+                    continue
+                print(f"Refreshing live tab for {token_type.upper()}...")
+                # Load the replacement without the lock so captures keep
+                # using the current tab meanwhile, then swap it in
+                tab = await self._load(token_type)
+                if tab is None:
+                    continue
+                async with self._locks[token_type]:
+                    if self._healthy(self._tabs.get(token_type)):
+                        # A capture already reloaded it
+                        await browser_pool.pool.close_page(tab['context'])
+                        continue
+                    await self._discard(token_type)
+                    self._tabs[token_type] = tab
+
+    async def capture(self, token_type: str, timeframe: str):
+        """
+        Screenshot the live tab for a token, switching interval if needed
+
+        Returns:
+            bytes: PNG data or None if the tab is unavailable
+        """
+        async with self._locks[token_type]:
+            tab = self._tabs.get(token_type)
+            # Stale tabs and tabs on a recycled browser still capture fine
+            # until the refresher swaps them out; only broken ones reload here
+            if not self._usable(tab):
+                await self._open(token_type)
+                tab = self._tabs.get(token_type)
+                if tab is None or tab['frame'] is None:
+                    return None
+            route_stats = tab['route_stats']
+            if route_stats:
+                route_stats.reset()
+            try:
+                if tab['timeframe'] != timeframe:
+                    await set_timeframe(tab['page'], tab['frame'], timeframe)
+                    tab['timeframe'] = timeframe
+                data = await screenshot_chart(tab['frame'], token_type)
+                browser_pool.pool.record_use()
+                if route_stats:
+                    print(f"Live tab traffic: {route_stats.summary()}")
+                return data
+            except Exception as e:
+                print(f"Error capturing live tab for {token_type}: {str(e)}")
+                # Force a reload on the next refresh pass
+                tab['crashed'] = True
+                return None
+
+live_tabs = LiveChartTabs()
 
 async def capture_chart_async(token_type: str = 'tetsuo', timeframe: str = '1h'):
     """
     Capture chart for specified token using async Playwright
-    
+
     Args:
         token_type (str): Token to capture chart for ('tetsuo' or 'sol')
-    
+
     Returns:
-        str: Path to saved screenshot or None if error
+        bytes: PNG data or None if error
     """
-    urls = {
-        'tetsuo': "https://coinmarketcap.com/dexscan/solana/2KB3i5uLKhUcjUwq3poxHpuGGqBWYwtTk5eG9E5WnLG6/",
-        'sol': "https://coinmarketcap.com/dexscan/osmosis/1960/",
-    }
-    
-    if token_type.lower() not in urls:
+    token_type = token_type.lower()
+    if token_type not in urls:
         print(f"Unsupported token type: {token_type}")
         return None
-        
-    url = urls[token_type.lower()]
-    browser = None
-    
-    async with async_playwright() as p:
-        try:
-            print(f"\nStarting chart capture for {token_type.upper()}...")
-            
-            browser = await p.chromium.launch(
-                headless=True,
-                args=['--disable-blink-features=AutomationControlled']
-            )
-            
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                screen={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            
-            page = await context.new_page()
-            
-            print("\nNavigating to page...")
-            await page.goto(url, wait_until='networkidle', timeout=30000)
-            
-            # Enable dark mode
-            #print("\nEnabling dark mode...")
-            #await page.locator(".UserDropdown_user-avatar-wrapper__YEFUG > .sc-65e7f566-0 > use").click()
-            #await page.get_by_role("tooltip", name="Log In Sign Up Language").locator("span div").click()
-            #await page.locator(".HeaderV3_main-header__xTs_o").click()
-            print("\nEnabling dark mode...")
-            await page.locator(".UserDropdown_user-avatar-wrapper__YEFUG > .sc-65e7f566-0").click()
-            await page.get_by_role("heading", name="Dark").click()
-            await page.locator(".HeaderV3_main-header__xTs_o").click()
-
-            print("\nLooking for TradingView iframe...")
-            iframe = await page.wait_for_selector("iframe[name^='tradingview_']", timeout=15000)
-            frame = await iframe.content_frame()
-            
-            # Wait for chart elements using exact selectors from codegen
-            print("\nWaiting for chart elements...")
-            await frame.get_by_label(f"Chart for {'TETSUO/USD' if token_type == 'tetsuo' else 'SOL/USD'}, 1 hour").wait_for(timeout=10000)
-            await frame.locator(".price-axis > canvas:nth-child(2)").wait_for(timeout=10000)
-            await frame.locator("div:nth-child(2) > div:nth-child(2) > div > canvas:nth-child(2)").wait_for(timeout=10000)
-            
-            # Set 1h timeframe by clicking the button
-            # print("Setting 1h timeframe...")
-            # await frame.get_by_role("radio", name="1 hour").click()
-            
-            # Set timeframe
-            timeframe_map = {
-                "15m": "15 minutes",
-                "30m": "30 minutes",
-                "1h": "1 hour",
-                "4h": "4 hours",
-                "1d": "1 day"
-            }
-            print(f"Setting {timeframe} timeframe...")
-            await frame.get_by_role("button", name="Time Interval").click()
-            await frame.get_by_text(timeframe_map[timeframe]).click()
-
-            # Additional wait for chart update
-            await page.wait_for_timeout(5000)
-            
-            print("Taking screenshot...")
-            os.makedirs(settings.SCREENSHOT_DIR, exist_ok=True)
-            screenshot_path = f"{settings.SCREENSHOT_DIR}/{token_type.lower()}_chart.png"
-            
-            # Get the chart widget and take screenshot
-            chart_widget = frame.locator(".chart-widget").first
-            await chart_widget.screenshot(path=screenshot_path)
-            
-            print(f"✅ Screenshot saved to: {screenshot_path}")
-            await browser.close()
-            return screenshot_path
-            
-        except Exception as e:
-            print(f"Error during capture: {str(e)}")
-            if browser:
-                await browser.close()
-            return None
+
+    # Hot path: reuse the already loaded page for this token
+    if live_tabs.running:
+        data = await live_tabs.capture(token_type, timeframe)
+        if data:
+            return data
+        print(f"Live tab unavailable for {token_type}, falling back to a fresh page")
+
+    try:
+        print(f"\nStarting chart capture for {token_type.upper()}...")
+
+        async with browser_pool.page() as page:
+            route_stats = await page_router.attach(page)
+            frame = await prepare_chart_page(page, token_type)
+            await set_timeframe(page, frame, timeframe)
+            data = await screenshot_chart(frame, token_type)
+            if route_stats:
+                print(f"Capture traffic: {route_stats.summary()}")
+            return data
+
+    except Exception as e:
+        print(f"Error during capture: {str(e)}")
+        return None
 
 def capture_chart(token_type: str = 'tetsuo'):
-    """Synchronous wrapper for capture_chart_async"""
-    import asyncio
-    return asyncio.run(capture_chart_async(token_type))
+    """Synchronous wrapper for capture_chart_async, saves the PNG for inspection"""
+    data = asyncio.run(capture_chart_async(token_type))
+    if data is None:
+        return None
+    os.makedirs(settings.SCREENSHOT_DIR, exist_ok=True)
+    screenshot_path = f"{settings.SCREENSHOT_DIR}/{token_type}_chart.png"
+    with open(screenshot_path, 'wb') as f:
+        f.write(data)
+    print(f"✅ Screenshot saved to: {screenshot_path}")
+    return screenshot_path
 
 if __name__ == "__main__":
-    capture_chart('tetsuo')
\ No newline at end of file
+    capture_chart('tetsuo')
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import os
+import settings
+
+# CMC marks the active theme on <html>/<body>, either as a class or data-theme
+DARK_MODE_JS = """
+() => [document.documentElement, document.body].some(el => el && (
+    /dark|night/i.test(el.className || '') || /dark|night/i.test(el.getAttribute('data-theme') || '')
+))
+"""
+
+def load_state():
+    """Return the saved CMC storage state, or None if there is no usable file"""
+    path = settings.CMC_STORAGE_STATE
+    if not settings.CMC_PERSIST_STATE or not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        invalidate()
+        return None
+
+def _write_state(state):
+    path = settings.CMC_STORAGE_STATE
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+async def save_state(context):
+    """Persist cookies and localStorage after a successful page setup"""
+    if not settings.CMC_PERSIST_STATE:
+        return
+    try:
+        state = await context.storage_state()
+        await asyncio.get_running_loop().run_in_executor(None, _write_state, state)
+        print("Saved CMC browser state")
+    except Exception as e:
+        print(f"Error saving CMC browser state: {str(e)}")
+
+def invalidate():
+    """Forget the saved state so the next capture runs the full setup"""
+    try:
+        os.remove(settings.CMC_STORAGE_STATE)
+        print("Discarded saved CMC browser state")
+    except OSError:
+        pass
+
+async def is_dark_mode(page):
+    try:
+        return await page.evaluate(DARK_MODE_JS)
+    except Exception:
+        return False
+
+async def enable_dark_mode(page):
+    """
+    Switch CMC to dark mode unless the stored state already did
+
+    Returns:
+        bool: True if the setup clicks had to run
+    """
+    if await is_dark_mode(page):
+        return False
+    print("\nEnabling dark mode...")
+    await page.locator(".UserDropdown_user-avatar-wrapper__YEFUG > .sc-65e7f566-0").click()
+    await page.get_by_role("heading", name="Dark").click()
+    await page.locator(".HeaderV3_main-header__xTs_o").click()
+    return True
+
+async def show_tradingview(page):
+    """
+    Make sure the TradingView chart is shown instead of CMC's own chart
+
+    Returns:
+        bool: True if the TradingView button had to be clicked
+    """
+    try:
+        await page.wait_for_selector("iframe[name^='tradingview_']", timeout=3000)
+        return False
+    except Exception:
+        pass
+    try:
+        tradingview_button = page.get_by_role("button", name="TradingView")
+        await tradingview_button.wait_for(state="visible", timeout=5000)
+        await tradingview_button.click()
+        return True
+    except Exception:
+        print("Already on TradingView chart or button not found")
+        return False
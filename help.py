@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 import settings
+import rate_limit
 from datetime import datetime
 
 class HelpCommands(commands.Cog):
@@ -17,13 +18,18 @@ class HelpCommands(commands.Cog):
             timestamp=datetime.now()
         )
         
-        commands_info = {
-            "!tetsuo": "Show current TETSUO price information (60s cooldown)",
-            "!sol": "Show current Solana price information (60s cooldown)",
-            "!chart tetsuo [timeframe]": "Show TETSUO price chart (15s cooldown). Timeframes: 15m, 30m, 1h, 4h, 1d",
-            "!chart sol [timeframe]": "Show Solana price chart (15s cooldown). Timeframes: 15m, 30m, 1h, 4h, 1d",
-            "!help": "Show this help message"
-        }
+        # Price and chart commands come from the token registry
+        commands_info = {}
+        price_limit = rate_limit.limiter.describe('price')
+        chart_limit = rate_limit.limiter.describe('chart')
+        for token_type, token in settings.TOKENS.items():
+            commands_info[f"!{token_type}"] = f"Show current {token['name']} price information ({price_limit})"
+        for token_type, token in settings.TOKENS.items():
+            commands_info[f"!chart {token_type} [timeframe]"] = f"Show {token['name']} price chart ({chart_limit}). Timeframes: 15m, 30m, 1h, 4h, 1d"
+        commands_info["!alert <token> <price|percent%>"] = "Get pinged here when the price crosses a level or moves that much within an hour"
+        commands_info["!alerts"] = "List your price alerts"
+        commands_info["!unalert <id>"] = "Remove one of your price alerts"
+        commands_info["!help"] = "Show this help message"
         
         for cmd, desc in commands_info.items():
             embed.add_field(name=cmd, value=desc, inline=False)
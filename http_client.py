@@ -0,0 +1,51 @@
+import asyncio
+import aiohttp
+import settings
+
+_session = None
+_session_lock = asyncio.Lock()
+
+async def get_session():
+    """Return the shared aiohttp session, creating it on first use"""
+    global _session
+    if _session is not None and not _session.closed:
+        return _session
+
+    async with _session_lock:
+        if _session is None or _session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.HTTP_POOL_SIZE,
+                limit_per_host=settings.HTTP_POOL_SIZE_PER_HOST,
+                keepalive_timeout=settings.HTTP_KEEPALIVE,
+                ttl_dns_cache=300
+            )
+            _session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.HTTP_TIMEOUT),
+                headers={'accept': 'application/json'}
+            )
+    return _session
+
+async def fetch_json(url, timeout=None):
+    """
+    GET a URL on the shared pool and decode the JSON body
+
+    Args:
+        url (str): URL to fetch
+        timeout (float): Per-request timeout in seconds, defaults to settings.HTTP_TIMEOUT
+
+    Returns:
+        dict: Decoded JSON body, raises on HTTP or timeout errors
+    """
+    session = await get_session()
+    request_timeout = aiohttp.ClientTimeout(total=timeout or settings.HTTP_TIMEOUT)
+    async with session.get(url, timeout=request_timeout) as response:
+        response.raise_for_status()
+        return await response.json(content_type=None)
+
+async def close():
+    """Close the shared session and release pooled connections"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
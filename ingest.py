@@ -0,0 +1,105 @@
+# Standalone price ingestion service. Polls the upstream APIs once for every
+# bot process, records price history, and publishes each tick on the quote
+# bus; bots started with QUOTE_BUS = True subscribe instead of polling.
+#
+#   python ingest.py          # Poll DexScreener and friends
+#   python ingest.py --stub   # Publish a random walk, no network (for testing)
+
+import argparse
+import asyncio
+import random
+import time
+import settings
+import http_client
+import quote_cache
+import quote_providers
+import price_store
+import poll_schedule
+import quote_bus
+
+class IngestService:
+    def __init__(self, stub=False):
+        self.stub = stub
+        self.schedule = poll_schedule.PollScheduler()
+        self.server = quote_bus.QuoteBusServer(settings.QUOTE_BUS_PATH, on_demand=self.schedule.record_demand)
+        self._walk = {}  # token -> stub price
+
+    async def tick(self):
+        """Fetch every registered token once and record the new samples"""
+        pairs = await quote_cache.get_pairs()
+        tokens = {}
+        for token_type, pair in pairs.items():
+            sample = None
+            try:
+                if pair:
+                    sample = price_store.store.record(token_type, pair)
+            except Exception as e:
+                print(f'Error recording {token_type} sample: {str(e)}')
+            try:
+                quote = await quote_providers.get_quote(token_type)
+            except Exception as e:
+                print(f'Error fetching {token_type} quote: {str(e)}')
+                quote = None
+            tokens[token_type] = {'pair': pair, 'quote': quote, 'sample': sample}
+        return tokens
+
+    def stub_tick(self):
+        """A random-walk tick shaped like a real one, nothing is fetched or recorded"""
+        ts = time.time()
+        tokens = {}
+        for token_type in settings.TOKENS:
+            price = self._walk.get(token_type, 1.0)
+            price *= 1 + random.gauss(0, 0.005)
+            self._walk[token_type] = price
+            change = random.uniform(-10, 10)
+            volume = random.uniform(1e4, 1e6)
+            pair = {
+                'priceUsd': f"{price:.8g}",
+                'priceChange': {'h24': change},
+                'volume': {'h24': volume, 'm5': volume / 288},
+                'fdv': price * 1e9
+            }
+            quote = {
+                'price': price,
+                'change_24h': change,
+                'market_cap': price * 1e9,
+                'volume_24h': volume,
+                'fetched_at': ts
+            }
+            tokens[token_type] = {'pair': pair, 'quote': quote, 'sample': (ts, price, volume / 288)}
+        return tokens
+
+    async def run(self):
+        await self.server.start()
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    tokens = self.stub_tick() if self.stub else await self.tick()
+                except Exception as e:
+                    print(f'Error polling prices: {str(e)}')
+                    tokens = {}
+                for token_type, data in tokens.items():
+                    if data['sample']:
+                        self.schedule.record_price(token_type, data['sample'][0], data['sample'][1])
+                interval = settings.QUOTE_BUS_STUB_INTERVAL if self.stub else self.schedule.next_interval()
+                if tokens:
+                    self.server.publish({'type': 'tick', 'ts': time.time(), 'interval': interval, 'tokens': tokens})
+                print(f'Published tick in {time.monotonic() - started:.2f}s, next in {interval:.0f}s')
+                await asyncio.sleep(interval)
+        finally:
+            await self.server.close()
+            price_store.store.close()
+            await http_client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Price ingestion service for the quote bus")
+    parser.add_argument('--stub', action='store_true', help="publish random-walk quotes instead of polling")
+    args = parser.parse_args()
+    try:
+        asyncio.run(IngestService(stub=args.stub).run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlparse
+import settings
+
+CACHEABLE_TYPES = {'script', 'stylesheet', 'font', 'image'}
+
+# Bodies are stored decoded, so these would no longer describe them
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+class RouteStats:
+    """Request and byte counters for one capture"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.blocked = 0
+        self.cache_hits = 0
+        self.bytes_from_cache = 0
+        self.bytes_from_network = 0
+
+    def summary(self):
+        return (f"{self.requests} requests, {self.blocked} blocked, "
+                f"{self.cache_hits} served from cache ({self.bytes_from_cache / 1024:.0f} KB saved), "
+                f"{self.bytes_from_network / 1024:.0f} KB fetched")
+
+def _host_matches(host, domains):
+    return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+class AssetCache:
+    """On-disk cache for static assets, keyed by URL"""
+
+    def __init__(self, directory, ttl, max_bytes):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._writes = 0
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode()).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.body', base + '.json'
+
+    def load(self, url):
+        body_path, meta_path = self._paths(url)
+        try:
+            if time.time() - os.path.getmtime(body_path) > self.ttl:
+                return None
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def store(self, url, status, headers, body):
+        os.makedirs(self.directory, exist_ok=True)
+        body_path, meta_path = self._paths(url)
+        with open(body_path, 'wb') as f:
+            f.write(body)
+        headers = {name: value for name, value in headers.items() if name.lower() not in DROPPED_HEADERS}
+        with open(meta_path, 'w') as f:
+            json.dump({'status': status, 'headers': headers}, f)
+        self._writes += 1
+        if self._writes % 50 == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop the oldest bodies until the cache fits in max_bytes"""
+        try:
+            entries = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.body')]
+        except OSError:
+            return
+        entries = sorted((os.path.getmtime(path), os.path.getsize(path), path) for path in entries)
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            for target in (path, path[:-len('.body')] + '.json'):
+                try:
+                    os.remove(target)
+                except OSError:
+                    pass
+            total -= size
+
+asset_cache = AssetCache(settings.ROUTE_CACHE_DIR, settings.ROUTE_CACHE_TTL, settings.ROUTE_CACHE_MAX_BYTES)
+
+class PageRouter:
+    """Playwright route handler that drops unneeded traffic and caches static assets"""
+
+    def __init__(self, stats=None):
+        self.stats = stats or RouteStats()
+
+    def should_block(self, host, resource_type):
+        if _host_matches(host, settings.ROUTE_DENY_DOMAINS):
+            return True
+        if resource_type in settings.ROUTE_BLOCK_RESOURCE_TYPES:
+            return not _host_matches(host, settings.ROUTE_ALLOW_DOMAINS)
+        return False
+
+    async def handle(self, route):
+        request = route.request
+        self.stats.requests += 1
+        host = urlparse(request.url).hostname or ''
+
+        if self.should_block(host, request.resource_type):
+            self.stats.blocked += 1
+            await route.abort()
+            return
+
+        if request.method != 'GET' or request.resource_type not in CACHEABLE_TYPES:
+            await route.continue_()
+            return
+
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, asset_cache.load, request.url)
+        if cached:
+            meta, body = cached
+            self.stats.cache_hits += 1
+            self.stats.bytes_from_cache += len(body)
+            await route.fulfill(status=meta['status'], headers=meta['headers'], body=body)
+            return
+
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            await route.abort()
+            return
+        self.stats.bytes_from_network += len(body)
+        headers = response.headers
+        if response.status == 200 and 'no-store' not in headers.get('cache-control', ''):
+            await loop.run_in_executor(None, asset_cache.store, request.url, response.status, headers, body)
+        await route.fulfill(response=response, body=body)
+
+async def attach(page):
+    """
+    Route all requests of a page through a PageRouter
+
+    Returns:
+        RouteStats: Counters for the page, or None when filtering is disabled
+    """
+    if not settings.ROUTE_FILTERING:
+        return None
+    router = PageRouter()
+    await page.route("**/*", router.handle)
+    return router.stats
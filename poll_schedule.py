@@ -0,0 +1,45 @@
+import math
+import time
+import settings
+
+class PollScheduler:
+    """
+    Picks the price poller's next interval between POLL_MIN_INTERVAL and
+    POLL_MAX_INTERVAL. Activity is the larger of recent price volatility
+    and command demand, each relative to its target; the interval shrinks
+    as activity grows and relaxes back to the maximum when things are quiet.
+    """
+
+    def __init__(self):
+        self._last = {}         # token -> (ts, price) of the previous sample
+        self._volatility = {}   # token -> EWMA of absolute returns per sqrt(minute)
+        self._demand = 0.0
+        self._demand_at = time.monotonic()
+
+    def record_price(self, token_type, ts, price):
+        """Fold a new price sample into the token's volatility estimate"""
+        last = self._last.get(token_type)
+        self._last[token_type] = (ts, price)
+        if not last or ts <= last[0] or last[1] <= 0:
+            return
+        move = abs(price / last[1] - 1) / math.sqrt((ts - last[0]) / 60)
+        previous = self._volatility.get(token_type, move)
+        self._volatility[token_type] = previous + settings.POLL_VOLATILITY_ALPHA * (move - previous)
+
+    def record_demand(self, weight=1.0):
+        """Count a price or chart command towards demand"""
+        self._demand = self.demand() + weight
+        self._demand_at = time.monotonic()
+
+    def demand(self):
+        elapsed = time.monotonic() - self._demand_at
+        return self._demand * math.pow(0.5, elapsed / settings.POLL_DEMAND_HALF_LIFE)
+
+    def activity(self):
+        volatility = max(self._volatility.values(), default=0.0)
+        return max(volatility / settings.POLL_VOLATILITY_TARGET, self.demand() / settings.POLL_DEMAND_TARGET)
+
+    def next_interval(self):
+        """Seconds until the next poll"""
+        interval = settings.POLL_MAX_INTERVAL / (1 + self.activity())
+        return max(settings.POLL_MIN_INTERVAL, min(settings.POLL_MAX_INTERVAL, interval))
@@ -0,0 +1,98 @@
+import asyncio
+import math
+import time
+from collections import deque
+import settings
+import chart_cache
+import chart_jobs
+
+class Prerenderer:
+    """
+    Keeps popular (token, timeframe) charts warm in the chart cache.
+    Combos come from settings.PRERENDER_CHARTS plus whatever !chart requests
+    show is in demand, and capture time is capped at settings.PRERENDER_BUDGET.
+    """
+
+    def __init__(self, capture):
+        self.capture = capture
+        self._demand = {}         # (token, timeframe) -> (decayed count, last update)
+        self._spent = deque()     # (finished_at, seconds) of recent pre-renders
+        self._task = None
+
+    def record(self, token_type, timeframe):
+        """Count a !chart request towards a combo's demand"""
+        key = (token_type, timeframe)
+        self._demand[key] = (self._decayed(key) + 1, time.monotonic())
+
+    def _decayed(self, key):
+        count, updated = self._demand.get(key, (0.0, time.monotonic()))
+        half_life = settings.PRERENDER_DEMAND_HALF_LIFE
+        return count * math.pow(0.5, (time.monotonic() - updated) / half_life)
+
+    def hot_combos(self):
+        """Configured combos first, then the most requested ones"""
+        combos = [tuple(combo) for combo in settings.PRERENDER_CHARTS]
+        ranked = sorted(self._demand, key=self._decayed, reverse=True)
+        for key in ranked:
+            if len(combos) >= settings.PRERENDER_MAX_COMBOS:
+                break
+            if key not in combos and self._decayed(key) >= settings.PRERENDER_MIN_DEMAND:
+                combos.append(key)
+        return combos
+
+    def budget_used(self):
+        """Share of the recent window spent on pre-render captures"""
+        window = settings.PRERENDER_WINDOW
+        cutoff = time.monotonic() - window
+        while self._spent and self._spent[0][0] < cutoff:
+            self._spent.popleft()
+        return sum(seconds for _, seconds in self._spent) / window
+
+    def schedule(self, interval):
+        """Start a pre-render pass in the background unless one is still running"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(interval))
+
+    async def run(self, interval):
+        """
+        Refresh every hot combo that would go stale before the next price tick
+
+        Args:
+            interval (float): Seconds until the next price tick
+        """
+        for token_type, timeframe in self.hot_combos():
+            age = chart_cache.cache.age(token_type, timeframe)
+            ttl = settings.CHART_CACHE_TTL.get(timeframe, 0)
+            if age is not None and age + interval < ttl:
+                continue
+            if self.budget_used() >= settings.PRERENDER_BUDGET:
+                print("Pre-render budget used up, skipping the rest of this pass")
+                return
+
+            try:
+                # Lowest priority so user requests always run first
+                job = chart_jobs.scheduler.submit(
+                    token_type, timeframe,
+                    lambda token_type=token_type, timeframe=timeframe: self._timed_capture(token_type, timeframe),
+                    priority=2
+                )
+                await asyncio.shield(job.future)
+            except chart_jobs.QueueFullError:
+                return
+            except Exception as e:
+                print(f"Error pre-rendering {token_type} {timeframe}: {str(e) or type(e).__name__}")
+
+    async def _timed_capture(self, token_type, timeframe):
+        """Run a capture and charge its duration to the pre-render budget"""
+        started = time.monotonic()
+        try:
+            return await self.capture(token_type, timeframe)
+        finally:
+            seconds = time.monotonic() - started
+            self._spent.append((time.monotonic(), seconds))
+            print(f"Pre-rendered {token_type} {timeframe} in {seconds:.1f}s")
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
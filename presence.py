@@ -0,0 +1,79 @@
+import asyncio
+import time
+import discord
+import settings
+
+class PresenceUpdater:
+    """
+    Pushes the price nickname to every guild and the price status to the
+    gateway, skipping pushes that wouldn't change anything. Nickname edits
+    run concurrently up to NICKNAME_CONCURRENCY; discord.py queues them on
+    each guild's member route bucket and waits out any 429s. Guilds that
+    refuse the edit are left alone for a growing backoff.
+
+    With the adaptive poller ticking faster than the display needs, edits
+    are also spaced out: a guild's nickname at most every
+    NICKNAME_MIN_INTERVAL seconds, and the presence every
+    PRESENCE_MIN_INTERVAL seconds unless the up/down status flips.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._nicknames = {}   # guild id -> (nickname last pushed, pushed at)
+        self._forbidden = {}   # guild id -> (retry at, current backoff)
+        self._presence = None  # (status, activity name) last pushed
+        self._presence_at = 0.0
+        self._semaphore = None  # Created on the running loop
+
+    async def update_nicknames(self, nickname):
+        """Set the bot's nickname in every guild where it differs"""
+        now = time.monotonic()
+        guilds = [
+            guild for guild in self.bot.guilds
+            if self._nickname_due(guild, nickname, now)
+            and self._forbidden.get(guild.id, (0, 0))[0] <= now
+        ]
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.NICKNAME_CONCURRENCY)
+        results = await asyncio.gather(*(self._edit_nickname(guild, nickname) for guild in guilds))
+        if guilds:
+            print(f'Updated price to {nickname} in {sum(results)}/{len(guilds)} guilds')
+
+    def _nickname_due(self, guild, nickname, now):
+        if guild.me.nick == nickname:
+            return False
+        last, pushed_at = self._nicknames.get(guild.id, (None, 0.0))
+        return last != nickname and now - pushed_at >= settings.NICKNAME_MIN_INTERVAL
+
+    async def _edit_nickname(self, guild, nickname):
+        async with self._semaphore:
+            try:
+                await guild.me.edit(nick=nickname)
+            except discord.errors.Forbidden:
+                _, backoff = self._forbidden.get(guild.id, (0, 0))
+                backoff = min(backoff * 2, settings.NICKNAME_FORBIDDEN_MAX_BACKOFF) if backoff else settings.NICKNAME_FORBIDDEN_BACKOFF
+                self._forbidden[guild.id] = (time.monotonic() + backoff, backoff)
+                print(f'Missing permissions to change nickname in {guild.name}, retrying in {backoff}s')
+                return False
+            except discord.HTTPException as e:
+                print(f'Error changing nickname in {guild.name}: {str(e)}')
+                return False
+        self._nicknames[guild.id] = (nickname, time.monotonic())
+        self._forbidden.pop(guild.id, None)
+        return True
+
+    async def update_presence(self, status, activity_name):
+        """Change the bot's status and custom activity if either differs"""
+        if self._presence == (status, activity_name):
+            return
+        status_flipped = self._presence is None or self._presence[0] != status
+        if not status_flipped and time.monotonic() - self._presence_at < settings.PRESENCE_MIN_INTERVAL:
+            return
+        await self.bot.change_presence(status=status, activity=discord.CustomActivity(name=activity_name))
+        self._presence = (status, activity_name)
+        self._presence_at = time.monotonic()
+
+    def forget_guild(self, guild_id):
+        """Drop state for a guild the bot left"""
+        self._nicknames.pop(guild_id, None)
+        self._forbidden.pop(guild_id, None)
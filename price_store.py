@@ -0,0 +1,197 @@
+import os
+import time
+import numpy as np
+import settings
+
+SAMPLE_DTYPE = np.dtype([('ts', '<f8'), ('price', '<f8'), ('volume', '<f8')])
+
+class TokenSeries:
+    """
+    Append-only price/volume samples for one token in a fixed-size ring buffer,
+    backed by a memory-mapped file so history survives restarts.
+
+    Record 0 of the file is a header whose 'ts' field holds the total number
+    of samples ever written; samples live in records 1..capacity.
+    """
+
+    def __init__(self, path, capacity):
+        self.path = path
+        self.capacity = capacity
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        if os.path.exists(path) and os.path.getsize(path) != (capacity + 1) * SAMPLE_DTYPE.itemsize:
+            self._resize(path, capacity)
+        mode = 'r+' if os.path.exists(path) else 'w+'
+        records = np.memmap(path, dtype=SAMPLE_DTYPE, mode=mode, shape=(capacity + 1,))
+        self._file = records
+        self._header = records[:1]
+        self._data = records[1:]
+
+    @staticmethod
+    def _resize(path, capacity):
+        """
+        Rewrite a file created with another PRICE_STORE_CAPACITY, keeping the
+        newest samples; one that can't be read is moved aside to <path>.bad
+        """
+        size = os.path.getsize(path)
+        old_capacity = size // SAMPLE_DTYPE.itemsize - 1
+        tmp_path = path + '.tmp'
+        try:
+            if size % SAMPLE_DTYPE.itemsize or old_capacity < 1:
+                raise ValueError("unexpected file size")
+            old = TokenSeries(path, old_capacity)
+            samples = np.array(old.ordered()[-capacity:])
+            old.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            new = TokenSeries(tmp_path, capacity)
+            new._data[:len(samples)] = samples
+            new._header['ts'][0] = len(samples)
+            new.close()
+            os.replace(tmp_path, path)
+            print(f"Resized {path} from {old_capacity} to {capacity} samples")
+        except Exception as e:
+            os.replace(path, path + '.bad')
+            print(f"Could not resize {path}, moved it to {path}.bad and starting empty: {str(e)}")
+
+    @property
+    def total(self):
+        return int(self._header['ts'][0])
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def last(self):
+        """Most recent sample as (ts, price, volume), or None"""
+        if not self.total:
+            return None
+        sample = self._data[(self.total - 1) % self.capacity]
+        return float(sample['ts']), float(sample['price']), float(sample['volume'])
+
+    def append(self, price, volume=0.0, ts=None):
+        """Add a sample, ignoring ones that aren't newer than the last"""
+        ts = time.time() if ts is None else ts
+        last = self.last()
+        if last and ts <= last[0]:
+            return False
+        self._data[self.total % self.capacity] = (ts, price, volume)
+        # Bump the counter only after the record is in place
+        self._header['ts'][0] = self.total + 1
+        self._file.flush()
+        return True
+
+    def _halves(self):
+        """The ring as (older, newer) views, each sorted by time"""
+        total = self.total
+        if total <= self.capacity:
+            return self._data[:total], self._data[:0]
+        head = total % self.capacity
+        return self._data[head:], self._data[:head]
+
+    def ordered(self):
+        """All stored samples, oldest first"""
+        older, newer = self._halves()
+        return np.concatenate((older, newer)) if len(newer) else older
+
+    def range(self, start=None, end=None):
+        """Samples with start <= ts < end, oldest first; only the part in range is copied"""
+        parts = []
+        for half in self._halves():
+            ts = half['ts']
+            lo = 0 if start is None else np.searchsorted(ts, start, side='left')
+            hi = len(ts) if end is None else np.searchsorted(ts, end, side='left')
+            if hi > lo:
+                parts.append(half[lo:hi])
+        if not parts:
+            return self._data[:0]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def candles(self, step, count=None, end=None):
+        """
+        Resample samples into OHLCV candles
+
+        Args:
+            step (float): Candle length in seconds
+            count (int): Number of most recent candles to return
+            end (float): Exclusive end time, defaults to now
+
+        Returns:
+            dict: 'ts' (candle open time), 'open', 'high', 'low', 'close', 'volume' arrays
+        """
+        end = time.time() if end is None else end
+        start = None
+        if count is not None:
+            start = (np.floor(end / step) - count + 1) * step
+        return resample(self.range(start, end), step)
+
+    def close(self):
+        self._file.flush()
+        del self._file, self._header, self._data
+
+def resample(samples, step):
+    """Vectorised OHLCV aggregation of time-ordered samples into step-second buckets"""
+    ts = samples['ts']
+    price = samples['price']
+    if len(ts) == 0:
+        empty = np.empty(0)
+        return {'ts': empty, 'open': empty, 'high': empty, 'low': empty, 'close': empty, 'volume': empty}
+
+    buckets = np.floor(ts / step).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    return {
+        'ts': buckets[starts] * float(step),
+        'open': price[starts],
+        'high': np.maximum.reduceat(price, starts),
+        'low': np.minimum.reduceat(price, starts),
+        'close': price[ends],
+        'volume': np.add.reduceat(samples['volume'], starts)
+    }
+
+def estimate_volume(pair, seconds):
+    """
+    Estimate USD volume traded over the last `seconds` from DexScreener's
+    rolling volume windows, using the shortest window that covers it
+    """
+    volumes = pair.get('volume') or {}
+    for window, length in (('m5', 300), ('h1', 3600), ('h6', 21600), ('h24', 86400)):
+        if seconds <= length and volumes.get(window) is not None:
+            return float(volumes[window]) * seconds / length
+    if volumes.get('h24') is not None:
+        return float(volumes['h24']) * min(seconds, 86400) / 86400
+    return 0.0
+
+class PriceStore:
+    """One TokenSeries per token, opened on first use"""
+
+    def __init__(self, directory, capacity):
+        self.directory = directory
+        self.capacity = capacity
+        self._series = {}
+
+    def series(self, token_type):
+        if token_type not in self._series:
+            path = os.path.join(self.directory, f"{token_type}.bin")
+            self._series[token_type] = TokenSeries(path, self.capacity)
+        return self._series[token_type]
+
+    def record(self, token_type, pair, ts=None):
+        """
+        Append a sample from DexScreener pair data
+
+        Returns:
+            tuple: The stored (ts, price, volume), or None if it wasn't newer
+        """
+        ts = time.time() if ts is None else ts
+        series = self.series(token_type)
+        last = series.last()
+        elapsed = ts - last[0] if last else settings.PRICE_COOLDOWN
+        sample = (ts, float(pair['priceUsd']), estimate_volume(pair, elapsed))
+        return sample if series.append(sample[1], sample[2], ts) else None
+
+    def close(self):
+        for series in self._series.values():
+            series.close()
+        self._series.clear()
+
+store = PriceStore(settings.PRICE_STORE_DIR, settings.PRICE_STORE_CAPACITY)
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import settings
+
+# Newline-delimited JSON over a Unix domain socket. The ingestion service
+# (ingest.py) sends one 'tick' message per poll:
+#
+#   {"type": "tick", "ts": ..., "interval": <seconds to next tick>,
+#    "tokens": {token: {"pair": <DexScreener pair or null>,
+#                       "quote": <quote_providers quote or null>,
+#                       "sample": [ts, price, volume] or null}}}
+#
+# Subscribers may send {"type": "demand", "weight": n} back so command
+# traffic in any bot process speeds up polling.
+
+class QuoteBusServer:
+    """Publishes ticks to every connected subscriber, newest tick replayed on connect"""
+
+    def __init__(self, path, on_demand=None):
+        self.path = path
+        self.on_demand = on_demand
+        self._server = None
+        self._writers = set()
+        self._last_tick = None
+
+    async def start(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)  # Left behind by a previous run
+        self._server = await asyncio.start_unix_server(
+            self._handle, path=self.path, limit=settings.QUOTE_BUS_MAX_LINE
+        )
+        print(f"Quote bus listening on {self.path}")
+
+    async def _handle(self, reader, writer):
+        self._writers.add(writer)
+        print(f"Quote bus subscriber connected ({len(self._writers)} total)")
+        try:
+            if self._last_tick is not None:
+                writer.write(self._last_tick)
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if message.get('type') == 'demand' and self.on_demand:
+                    self.on_demand(float(message.get('weight', 1)))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+            print(f"Quote bus subscriber disconnected ({len(self._writers)} left)")
+
+    def publish(self, message):
+        """Send a message to all subscribers without waiting on slow ones"""
+        data = (json.dumps(message) + "\n").encode()
+        if message.get('type') == 'tick':
+            self._last_tick = data
+        for writer in list(self._writers):
+            if writer.is_closing():
+                self._writers.discard(writer)
+                continue
+            # Drop subscribers that stopped reading rather than buffer forever
+            if writer.transport.get_write_buffer_size() > settings.QUOTE_BUS_MAX_BUFFER:
+                print("Dropping quote bus subscriber that fell behind")
+                writer.close()
+                self._writers.discard(writer)
+                continue
+            writer.write(data)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in list(self._writers):
+            writer.close()
+        self._writers.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class QuoteBusClient:
+    """Subscribes to the quote bus and hands each tick to on_tick, reconnecting as needed"""
+
+    def __init__(self, path, on_tick):
+        self.path = path
+        self.on_tick = on_tick
+        self._writer = None
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(
+                    self.path, limit=settings.QUOTE_BUS_MAX_LINE
+                )
+                print(f"Subscribed to quote bus at {self.path}")
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    try:
+                        message = json.loads(line)
+                    except ValueError:
+                        continue
+                    if message.get('type') == 'tick':
+                        try:
+                            await self.on_tick(message)
+                        except Exception as e:
+                            print(f"Error handling quote bus tick: {str(e)}")
+                print("Quote bus closed the connection")
+            except (OSError, asyncio.IncompleteReadError) as e:
+                print(f"Quote bus unavailable: {str(e)}")
+            finally:
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+            await asyncio.sleep(settings.QUOTE_BUS_RECONNECT)
+
+    def send_demand(self, weight=1.0):
+        """Report command traffic to the ingestion service"""
+        if self._writer is not None and not self._writer.is_closing():
+            self._writer.write((json.dumps({'type': 'demand', 'weight': weight}) + "\n").encode())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
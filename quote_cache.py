@@ -0,0 +1,182 @@
+import asyncio
+import time
+import settings
+import http_client
+
+class QuoteCache:
+    """TTL cache for upstream quotes with single-flight request coalescing"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}   # key -> (fetched_at, value, ttl or None for the cache TTL)
+        self._inflight = {}  # key -> load Task shared by concurrent callers
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, key, loader, ttl=None):
+        """
+        Return the cached value for key, calling loader() at most once per TTL
+
+        Args:
+            key (str): Cache key, usually the token name
+            loader (callable): Coroutine function that fetches a fresh value
+            ttl (float): Override for the cache TTL in seconds
+
+        Returns:
+            The cached or freshly loaded value, raises if the load fails
+        """
+        ttl = self.ttl if ttl is None else ttl
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < (ttl if entry[2] is None else entry[2]):
+            self.hits += 1
+            return entry[1]
+
+        # One shared task per key; every caller, the one that started it
+        # included, waits through a shield so a cancelled caller (e.g. a
+        # losing hedged request) never cancels the fetch for the others
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, loader))
+            task.add_done_callback(self._retrieved)
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key, loader):
+        try:
+            value = await loader()
+            self._entries[key] = (time.monotonic(), value, None)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _retrieved(task):
+        # Mark the result retrieved so a failure nobody is left waiting for is not logged
+        if not task.cancelled():
+            task.exception()
+
+    def put(self, key, value, ttl=None):
+        """Store a value fetched elsewhere, e.g. pushed over the quote bus, with its own TTL if given"""
+        self._entries[key] = (time.monotonic(), value, ttl)
+
+    def invalidate(self, key=None):
+        """Drop one cached key, or everything when key is None"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        """Return hit/miss/coalesced counters"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            'entries': len(self._entries)
+        }
+
+quotes = QuoteCache(settings.QUOTE_TTL)
+
+def _batches():
+    """Registered token names grouped into DexScreener tokens-endpoint batches"""
+    tokens = [(name, token) for name, token in settings.TOKENS.items() if token.get('address')]
+    names = [name for name, token in tokens if token.get('batch', True)]
+    size = settings.DEX_BATCH_SIZE
+    batches = [names[i:i + size] for i in range(0, len(names), size)]
+    # High fan-out mints are fetched alone so they can't push other tokens' pairs off the list
+    return batches + [[name] for name, token in tokens if not token.get('batch', True)]
+
+def _batch_for(token_type):
+    for names in _batches():
+        if token_type in names:
+            return names
+    return None
+
+def _liquidity(pair):
+    return float((pair.get('liquidity') or {}).get('usd') or 0)
+
+def _pick_pair(token, pairs):
+    """
+    The configured pair if listed, else the deepest pair the token is the
+    base of, preferring stablecoin-quoted pairs that aren't thin
+    """
+    candidates = [pair for pair in pairs if pair.get('baseToken', {}).get('address') == token['address']]
+    for pair in candidates:
+        if pair.get('pairAddress') == token.get('pair_address'):
+            return pair
+    if not candidates:
+        return None
+
+    def rank(pair):
+        liquidity = _liquidity(pair)
+        stable = (pair.get('quoteToken') or {}).get('address') in settings.DEX_STABLE_QUOTES
+        return (stable and liquidity >= settings.DEX_MIN_STABLE_LIQUIDITY, liquidity)
+
+    return max(candidates, key=rank)
+
+async def _load_batch(names):
+    """Fetch the pairs of several tokens in one request to the tokens endpoint"""
+    addresses = ','.join(settings.TOKENS[name]['address'] for name in names)
+    data = await http_client.fetch_json(settings.DEX_TOKENS_API + addresses)
+    pairs = (data or {}).get('pairs') or []
+    return {name: _pick_pair(settings.TOKENS[name], pairs) for name in names}
+
+async def _load_dex_pair(token_type):
+    """Fetch a pair the tokens endpoint can't serve from its own pair endpoint"""
+    data = await http_client.fetch_json(settings.TOKENS[token_type]['dex_pair_api'])
+    if not data:
+        return None
+    # Pair endpoints return the pair both as 'pair' and as a one-item 'pairs'
+    if data.get('pair'):
+        return data['pair']
+    return data['pairs'][0] if data.get('pairs') else None
+
+async def get_pair(token_type):
+    """
+    Return the cached DexScreener pair data for a registered token
+
+    Tokens in the same batch share one cached request, so polling every
+    token costs one request per batch rather than one per token.
+    """
+    names = _batch_for(token_type)
+    if names:
+        pairs = await quotes.get(f"dex:{','.join(names)}", lambda: _load_batch(names))
+        return pairs.get(token_type)
+    if settings.TOKENS.get(token_type, {}).get('dex_pair_api'):
+        return await quotes.get(token_type, lambda: _load_dex_pair(token_type))
+    return None
+
+def put_pair(token_type, pair, ttl=None):
+    """Cache a token's pair under the same key get_pair() reads it from, None is ignored"""
+    if pair is None:
+        return
+    names = _batch_for(token_type)
+    if names:
+        key = f"dex:{','.join(names)}"
+        entry = quotes._entries.get(key)
+        pairs = dict(entry[1]) if entry else {}
+        pairs[token_type] = pair
+        quotes.put(key, pairs, ttl)
+    else:
+        quotes.put(token_type, pair, ttl)
+
+async def get_pairs():
+    """
+    Return {token: pair data or None} for every registered token, fetched
+    concurrently; lookups in the same batch coalesce into one request
+    """
+    names = list(settings.TOKENS)
+    results = await asyncio.gather(*(get_pair(name) for name in names), return_exceptions=True)
+    pairs = {}
+    for name, result in zip(names, results):
+        if isinstance(result, BaseException):
+            print(f"Error fetching {name} pair: {str(result)}")
+            result = None
+        pairs[name] = result
+    return pairs
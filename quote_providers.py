@@ -0,0 +1,232 @@
+import asyncio
+import time
+import settings
+import http_client
+import quote_cache
+
+class QuoteProvider:
+    """
+    A source of price summaries for the price commands. Subclasses
+    implement fetch(), returning a dict with 'price', 'change_24h' (percent),
+    'market_cap' and 'volume_24h' (None when unknown), or None if the source
+    has nothing for the token.
+    """
+    name = None
+
+    def supports(self, token):
+        return True
+
+    async def fetch(self, token_type):
+        raise NotImplementedError
+
+class DexScreenerProvider(QuoteProvider):
+    """Quotes from the batched DexScreener pair data the price poller uses"""
+    name = 'dexscreener'
+
+    def supports(self, token):
+        return bool(token.get('address') or token.get('dex_pair_api'))
+
+    async def fetch(self, token_type):
+        pair = await quote_cache.get_pair(token_type)
+        if not pair or not pair.get('priceUsd'):
+            return None
+        volume = pair.get('volume') or {}
+        return {
+            'price': float(pair['priceUsd']),
+            'change_24h': float(pair['priceChange']['h24']) if 'priceChange' in pair else 0,
+            'market_cap': float(pair['fdv']) if 'fdv' in pair else None,
+            'volume_24h': float(volume['h24']) if 'h24' in volume else None
+        }
+
+class GeckoTerminalProvider(QuoteProvider):
+    """Quotes from the token's most liquid GeckoTerminal pool"""
+    name = 'geckoterminal'
+
+    def supports(self, token):
+        return bool(token.get('address') and token.get('network'))
+
+    async def fetch(self, token_type):
+        token = settings.TOKENS[token_type]
+        data = await http_client.fetch_json(
+            f"{settings.GECKOTERMINAL_API}/networks/{token['network']}/tokens/{token['address']}/pools"
+        )
+        base_id = f"{token['network']}_{token['address']}"
+        for pool in (data or {}).get('data') or []:
+            base = pool.get('relationships', {}).get('base_token', {}).get('data', {})
+            attributes = pool.get('attributes', {})
+            if base.get('id') != base_id or not attributes.get('base_token_price_usd'):
+                continue
+            change = (attributes.get('price_change_percentage') or {}).get('h24')
+            volume = (attributes.get('volume_usd') or {}).get('h24')
+            market_cap = attributes.get('fdv_usd')
+            return {
+                'price': float(attributes['base_token_price_usd']),
+                'change_24h': float(change) if change is not None else 0,
+                'market_cap': float(market_cap) if market_cap is not None else None,
+                'volume_24h': float(volume) if volume is not None else None
+            }
+        return None
+
+class YFinanceProvider(QuoteProvider):
+    """Quotes from Yahoo Finance, a blocking scrape run in a worker thread"""
+    name = 'yfinance'
+
+    def supports(self, token):
+        return bool(token.get('yfinance_symbol'))
+
+    async def fetch(self, token_type):
+        symbol = settings.TOKENS[token_type]['yfinance_symbol']
+        info = await asyncio.get_running_loop().run_in_executor(None, self._info, symbol)
+        price = info.get('regularMarketPrice') or info.get('currentPrice')
+        if not price:
+            return None
+        prev_close = info.get('previousClose')
+        return {
+            'price': price,
+            'change_24h': ((price - prev_close) / prev_close) * 100 if prev_close else 0,
+            'market_cap': info.get('marketCap'),
+            'volume_24h': info.get('volume24Hr')
+        }
+
+    @staticmethod
+    def _info(symbol):
+        import yfinance as yf
+        return yf.Ticker(symbol).info
+
+class CircuitBreaker:
+    """
+    Skips a quote source after repeated failures. Once open, the source is
+    retried after a backoff that doubles each time the retry fails too.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.failures = 0
+        self.trips = 0          # Consecutive times the breaker opened
+        self.open_until = 0.0
+
+    def allow(self):
+        return time.monotonic() >= self.open_until
+
+    def success(self):
+        if self.trips:
+            print(f"Quote source {self.name} recovered")
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+
+    def failure(self):
+        self.failures += 1
+        # A failed retry after a trip reopens the breaker straight away
+        if self.failures < (1 if self.trips else settings.QUOTE_BREAKER_THRESHOLD):
+            return
+        backoff = min(settings.QUOTE_BREAKER_BACKOFF * 2 ** self.trips, settings.QUOTE_BREAKER_MAX_BACKOFF)
+        self.trips += 1
+        self.failures = 0
+        self.open_until = time.monotonic() + backoff
+        print(f"Quote source {self.name} failing, skipping it for {backoff:.0f}s")
+
+providers = {
+    provider.name: provider
+    for provider in (DexScreenerProvider(), GeckoTerminalProvider(), YFinanceProvider())
+}
+breakers = {name: CircuitBreaker(name) for name in providers}
+
+# token -> last quote any source returned, served stale when all sources fail
+_last_good = {}
+
+async def _fetch(provider, token_type):
+    """Run one provider fetch, feeding the result into its circuit breaker"""
+    breaker = breakers[provider.name]
+    try:
+        quote = await provider.fetch(token_type)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Error fetching {token_type} quote from {provider.name}: {str(e)}")
+        breaker.failure()
+        raise
+    breaker.success()
+    return quote
+
+async def _load_quote(token_type):
+    """
+    Ask the token's sources in order. The next source is started when the
+    current ones error, come back empty, or take longer than QUOTE_HEDGE_DELAY;
+    the first quote to arrive wins and the rest are cancelled.
+    """
+    token = settings.TOKENS[token_type]
+    candidates = iter([
+        providers[name] for name in token['sources']
+        if providers[name].supports(token) and breakers[name].allow()
+    ])
+    pending = set()
+    error = None
+
+    def launch_next():
+        provider = next(candidates, None)
+        if provider is not None:
+            pending.add(asyncio.ensure_future(_fetch(provider, token_type)))
+
+    launch_next()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending, timeout=settings.QUOTE_HEDGE_DELAY, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                launch_next()  # Slow source, hedge with the next one
+                continue
+            for task in done:
+                pending.discard(task)
+                if task.exception() is not None:
+                    error = task.exception()
+                elif task.result():
+                    return dict(task.result(), fetched_at=time.time())
+            if not pending:
+                launch_next()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if error:
+        raise error
+    if not any(breakers[name].allow() for name in token['sources']):
+        raise RuntimeError(f"All quote sources for {token_type} are backing off")
+    return None
+
+def put_quote(token_type, quote, ttl=None):
+    """Cache a quote fetched elsewhere, e.g. pushed over the quote bus; None is ignored"""
+    if not quote:
+        return
+    quote_cache.quotes.put(f"quote:{token_type}", quote, ttl)
+    _last_good[token_type] = quote
+
+def _serve_stale(token_type, reason):
+    stale = _last_good[token_type]
+    print(f"Serving stale {token_type} quote from {time.ctime(stale['fetched_at'])}: {reason}")
+    return dict(stale, stale=True)
+
+async def get_quote(token_type):
+    """
+    Price summary for a token's price command, cached like any other quote.
+    When every source fails or none has data, the last good quote is
+    returned with 'stale' set.
+
+    Returns:
+        dict: 'price', 'change_24h', 'market_cap', 'volume_24h' and
+              'fetched_at' (epoch seconds), or None if no source has ever had data
+    """
+    try:
+        quote = await quote_cache.quotes.get(f"quote:{token_type}", lambda: _load_quote(token_type))
+    except Exception as e:
+        if token_type not in _last_good:
+            raise
+        return _serve_stale(token_type, str(e))
+    if quote:
+        _last_good[token_type] = quote
+        return quote
+    # Every source answered without data, as much a failure to callers as an error
+    if token_type in _last_good:
+        return _serve_stale(token_type, "no source had data")
+    return None
@@ -0,0 +1,95 @@
+import time
+from collections import OrderedDict
+import settings
+
+class RateLimiter:
+    """
+    Token-bucket command limits from settings.RATE_LIMITS. Buckets live in
+    an LRU dict keyed by (bucket name, scope, scope id), so each check is
+    O(1). A bucket that has refilled is indistinguishable from a new one and
+    is dropped, and the dict never holds more than max_buckets entries.
+    """
+
+    def __init__(self, policies=None, max_buckets=None):
+        self.policies = settings.RATE_LIMITS if policies is None else policies
+        self.max_buckets = settings.RATE_LIMIT_MAX_BUCKETS if max_buckets is None else max_buckets
+        self._buckets = OrderedDict()  # key -> [tokens, updated, full_at, notified]
+
+    @staticmethod
+    def _scope_id(ctx, scope):
+        if scope == 'user':
+            return ctx.author.id
+        if scope == 'guild' and ctx.guild is not None:
+            return ctx.guild.id
+        return ctx.channel.id  # Channel scope, and guild scope in DMs
+
+    def _bucket(self, key, rule, now):
+        """Current bucket for key, refilled up to now"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return [float(rule['capacity']), now, now, False]
+        self._buckets.move_to_end(key)
+        bucket[0] = min(rule['capacity'], bucket[0] + (now - bucket[1]) / rule['per'])
+        bucket[1] = now
+        return bucket
+
+    def hit(self, ctx, policy, name=None):
+        """
+        Use one token from every bucket of a policy if all of them have one
+
+        Args:
+            ctx: Command context the scopes are taken from
+            policy (str): Key in RATE_LIMITS
+            name (str): Separate buckets under one policy, e.g. per token
+
+        Returns:
+            tuple: (allowed, retry_after seconds, notify) where notify is True
+                   only for the first refusal since the caller was last allowed
+        """
+        now = time.monotonic()
+        name = name or policy
+        rules = self.policies[policy]
+        entries = []
+        retry_after = 0.0
+        for rule in rules:
+            key = (name, rule['scope'], self._scope_id(ctx, rule['scope']))
+            bucket = self._bucket(key, rule, now)
+            entries.append((key, rule, bucket))
+            if bucket[0] < 1:
+                retry_after = max(retry_after, (1 - bucket[0]) * rule['per'])
+
+        allowed = retry_after == 0
+        notify = False
+        for key, rule, bucket in entries:
+            if allowed:
+                bucket[0] -= 1
+                bucket[3] = False
+            elif bucket[0] < 1:
+                notify = notify or not bucket[3]
+                bucket[3] = True
+            bucket[2] = now + (rule['capacity'] - bucket[0]) * rule['per']
+            if bucket[2] > now:
+                self._buckets[key] = bucket
+        self._evict(now)
+        return allowed, retry_after, notify
+
+    def _evict(self, now):
+        # Oldest-touched buckets first: drop the refilled ones, and any
+        # beyond the size bound
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket[2] > now and len(self._buckets) <= self.max_buckets:
+                break
+            self._buckets.popitem(last=False)
+
+    def describe(self, policy):
+        """Human-readable cooldown for help text, e.g. '60s cooldown'"""
+        rule = self.policies[policy][0]
+        if rule['capacity'] == 1:
+            return f"{rule['per']:g}s cooldown"
+        return f"{rule['capacity']} uses, 1 more every {rule['per']:g}s"
+
+    def __len__(self):
+        return len(self._buckets)
+
+limiter = RateLimiter()
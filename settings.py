@@ -1,21 +1,223 @@
 # Discord Bot Token
 BOT_TOKEN = 'YOUR_BOT_TOKEN_HERE'
 
+# Ticker bots run from this one process, one Discord application each.
+# 'env' names the .env variable holding the bot token and 'ticker' the
+# registry token shown in its nickname. The first entry polls prices for
+# all of them; set 'commands' False to keep a bot from answering commands
+# where another one already does.
+BOT_CLIENTS = [
+    {'ticker': 'tetsuo', 'env': 'DISCORD_TOKEN', 'commands': True}
+]
+
 # Cooldown settings (in seconds)
-PRICE_COOLDOWN = 300
+PRICE_COOLDOWN = 300           # First price poll interval, POLL_* settings adapt it from there
+PRICE_COMMAND_COOLDOWN = 60
 CHART_COOLDOWN = 15
 
-# Token addresses and API endpoints
-TETSUO = {
-    'address': '8i51XNNpGaKaj4G4nDdmQh95v4FKAxw8mhtaRoKd9tE8',
-    'dex_api': 'https://api.dexscreener.com/latest/dex/tokens/8i51XNNpGaKaj4G4nDdmQh95v4FKAxw8mhtaRoKd9tE8',
-    'pair_address': '6MXwJvp4U46YK7aM6pzMX7YYCyPx4dTaDXTnkjDXR35i'  # Raydium pair address
+# Command rate limits: token buckets holding `capacity` uses, refilled one
+# use every `per` seconds, kept per 'user', 'channel' or 'guild'. A command
+# runs only if every rule in its policy has a use left.
+RATE_LIMITS = {
+    'price': [{'scope': 'channel', 'capacity': 1, 'per': PRICE_COMMAND_COOLDOWN}],
+    'chart': [{'scope': 'user', 'capacity': 1, 'per': CHART_COOLDOWN}]
 }
+RATE_LIMIT_MAX_BUCKETS = 10_000  # Oldest idle buckets are dropped beyond this
+
+# HTTP client settings
+HTTP_TIMEOUT = 10              # Per-request timeout (seconds)
+HTTP_POOL_SIZE = 20            # Max pooled connections overall
+HTTP_POOL_SIZE_PER_HOST = 10   # Max pooled connections per host
+HTTP_KEEPALIVE = 60            # Keep idle connections open this long (seconds)
+
+# Quote cache settings
+QUOTE_TTL = 20                 # Reuse a fetched quote for this long (seconds)
+
+# Quote sources: a slow source is hedged with the next one, failing sources
+# are skipped for a growing backoff, and the last good quote is served
+# (marked stale) when every source fails
+QUOTE_HEDGE_DELAY = 0.8        # Seconds before a second source is asked too
+QUOTE_BREAKER_THRESHOLD = 3    # Consecutive failures before a source is skipped
+QUOTE_BREAKER_BACKOFF = 30     # First skip period (seconds), doubles per retry failure
+QUOTE_BREAKER_MAX_BACKOFF = 600
+GECKOTERMINAL_API = 'https://api.geckoterminal.com/api/v2'
+
+# Browser pool settings
+BROWSER_WARM_PAGES = 1         # Contexts/pages kept open and ready for captures
+BROWSER_MAX_USES = 50          # Relaunch Chromium after this many captures
+
+# Live tab settings (keep one CMC chart page open per token)
+CHART_LIVE_TABS = True         # Capture from already loaded pages when possible
+LIVE_TAB_MAX_AGE = 1800        # Reload a tab after this long (seconds)
+LIVE_TAB_CHECK_INTERVAL = 60   # How often the refresher checks tabs (seconds)
+
+# Chart readiness detection (replaces fixed sleeps after timeframe switches)
+CHART_READY_TIMEOUT = 4.5      # Give up waiting and screenshot anyway, below the old fixed 5s sleep (seconds)
+CHART_READY_STABLE_FRAMES = 5  # Canvases unchanged for this many frames counts as drawn
+CHART_READY_NETWORK_QUIET = 0.3  # No data requests for this long counts as settled (seconds)
+CHART_READY_TRIGGER_WINDOW = 0.5  # Requests starting this long after the new interval shows are still the switch's (seconds)
+
+# Request filtering for CMC page loads
+ROUTE_FILTERING = True
+ROUTE_BLOCK_RESOURCE_TYPES = ['image', 'media', 'font']  # Dropped unless from an allowed domain
+ROUTE_ALLOW_DOMAINS = ['tradingview.com']                # Always let these through
+ROUTE_DENY_DOMAINS = [                                   # Always dropped
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googlesyndication.com',
+    'doubleclick.net',
+    'adnxs.com',
+    'criteo.com',
+    'facebook.net',
+    'facebook.com',
+    'hotjar.com',
+    'clarity.ms',
+    'bing.com',
+    'ads-twitter.com',
+    'amplitude.com',
+    'segment.io',
+    'cookielaw.org'
+]
+ROUTE_CACHE_DIR = 'cache/assets'          # On-disk cache for repeat static assets
+ROUTE_CACHE_TTL = 86400                   # Seconds before a cached asset is refetched
+ROUTE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Saved CMC cookies/localStorage so captures start in dark mode on TradingView
+CMC_PERSIST_STATE = True
+CMC_STORAGE_STATE = 'cache/cmc_state.json'
+
+# Local price history recorded by the price poller
+PRICE_STORE_DIR = 'data'       # One memory-mapped file per token
+PRICE_STORE_CAPACITY = 100_000  # Samples kept per token (~1 year at 5 minute polling)
+
+# Price alerts (!alert), checked on every price tick
+ALERTS_FILE = 'data/alerts-{ticker}.json'  # Per bot process, named after its primary ticker
+ALERT_MAX_PER_USER = 20
+ALERT_MOVE_WINDOW = 3600       # Window percentage-move alerts are measured over (seconds)
+
+# Incrementally maintained candles and indicators
+CANDLE_CAPACITY = 512          # Candles kept per token and timeframe
+SMA_PERIOD = 20
+EMA_PERIOD = 50
+RSI_PERIOD = 14
 
-SOL = {
-    'address': 'sol',
-    'dex_api': 'https://api.dexscreener.com/latest/dex/pairs/osmosis/1960',
-    'pair_address': 'SOL'  # Special case for SOL
+# Quote bus: run `python ingest.py` once and set QUOTE_BUS = True so every
+# bot process subscribes to its ticks instead of polling upstream itself
+QUOTE_BUS = False
+QUOTE_BUS_PATH = 'data/quotes.sock'
+QUOTE_BUS_RECONNECT = 5        # Seconds between reconnect attempts
+QUOTE_BUS_MAX_LINE = 1 << 20   # Largest message accepted (bytes)
+QUOTE_BUS_MAX_BUFFER = 1 << 22  # Unsent bytes before a stalled subscriber is dropped
+QUOTE_BUS_STUB_INTERVAL = 5    # Tick interval of `ingest.py --stub` (seconds)
+QUOTE_BUS_STALE_TICKS = 3      # Missed tick intervals before bus quotes expire and the bot polls itself
+QUOTE_BUS_WATCHDOG = 30        # Seconds between checks for missed ticks
+
+# Adaptive price polling: faster when prices move or commands are busy
+POLL_MIN_INTERVAL = 60         # Seconds between polls at peak activity
+POLL_MAX_INTERVAL = 600        # Seconds between polls when quiet
+POLL_VOLATILITY_TARGET = 0.002  # Absolute return per sqrt(minute) that counts as busy
+POLL_VOLATILITY_ALPHA = 0.3    # EWMA weight of each new price move
+POLL_DEMAND_TARGET = 5         # Decayed command count that counts as busy
+POLL_DEMAND_HALF_LIFE = 900    # Seconds for command counts to halve
+
+# Nickname/presence updates on each price tick
+NICKNAME_CONCURRENCY = 4       # Guild nickname edits in flight at once
+NICKNAME_MIN_INTERVAL = 120    # Min seconds between nickname edits in one guild
+PRESENCE_MIN_INTERVAL = 120    # Min seconds between presence changes unless the status flips
+NICKNAME_FORBIDDEN_BACKOFF = 3600  # Skip a guild that refused the edit this long (seconds), doubling
+NICKNAME_FORBIDDEN_MAX_BACKOFF = 86400
+
+# Sparkline thumbnails attached to the !tetsuo and !sol embeds
+SPARKLINE_HOURS = 24           # Price history shown
+SPARKLINE_WIDTH = 300
+SPARKLINE_HEIGHT = 60
+
+# Chart renderer: 'scraper' screenshots CMC with Chromium, 'native' draws
+# candles with mplfinance in worker processes
+CHART_RENDERER = 'scraper'
+CHART_RENDER_WORKERS = 2       # Render processes for the native renderer
+
+# Chart job scheduler
+CHART_MAX_IN_FLIGHT = 1        # Scraper captures running at once (native uses CHART_RENDER_WORKERS)
+CHART_QUEUE_MAX = 10           # Distinct (token, timeframe) jobs allowed to wait
+CHART_JOB_TIMEOUT = 60         # Give up on a single capture after this long (seconds)
+CHART_QUEUE_TIMEOUT = 120      # Give up waiting for a chart after this long (seconds)
+CHART_QUEUE_POLL = 2           # How often queue positions are refreshed (seconds)
+
+# Rendered chart cache (stale entries are served, then refreshed in the background)
+CHART_CACHE_TTL = {            # Seconds a chart counts as fresh, per timeframe
+    '15m': 60,
+    '30m': 120,
+    '1h': 300,
+    '4h': 900,
+    '1d': 3600
+}
+CHART_CACHE_MAX_ENTRIES = 20
+CHART_CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+# Background pre-rendering of popular charts on each price tick
+PRERENDER_CHARTS = [           # Always kept warm
+    ('tetsuo', '1h'),
+    ('tetsuo', '15m'),
+    ('sol', '1h')
+]
+PRERENDER_MAX_COMBOS = 5       # Configured plus most requested combos, at most
+PRERENDER_MIN_DEMAND = 3       # Decayed request count before a combo counts as popular
+PRERENDER_DEMAND_HALF_LIFE = 3600  # Seconds for request counts to halve
+PRERENDER_BUDGET = 0.25        # Max share of capture time spent pre-rendering
+PRERENDER_WINDOW = 600         # Window the budget is measured over (seconds)
+
+# Token registry: price commands, polling and charts are generated from it.
+# Tokens with an 'address' are fetched together from DexScreener's tokens
+# endpoint; 'dex_pair_api' covers pairs that endpoint can't serve. The
+# endpoint returns one capped pair list per request, so mints in thousands
+# of pools (e.g. wrapped SOL) set 'batch': False to get a request of their
+# own instead of crowding the other tokens' pairs out of a shared one.
+DEX_TOKENS_API = 'https://api.dexscreener.com/latest/dex/tokens/'
+DEX_BATCH_SIZE = 30            # Addresses per tokens request (API limit)
+# Without a pinned 'pair_address' the deepest pair by liquidity.usd is used,
+# preferring pairs quoted in these stablecoins (USDC, USDT) unless they are thin
+DEX_STABLE_QUOTES = {
+    'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',
+    'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB'
+}
+DEX_MIN_STABLE_LIQUIDITY = 100_000  # USD
+
+TOKENS = {
+    'tetsuo': {
+        'symbol': 'TETSUO',
+        'name': 'TETSUO',
+        'address': '8i51XNNpGaKaj4G4nDdmQh95v4FKAxw8mhtaRoKd9tE8',
+        'pair_address': '6MXwJvp4U46YK7aM6pzMX7YYCyPx4dTaDXTnkjDXR35i',  # Raydium pair address
+        'network': 'solana',       # GeckoTerminal network id
+        'sources': ['dexscreener', 'geckoterminal'],  # Quote providers, in order
+        'url': 'https://dexscreener.com/solana/2kb3i5ulkhucjuwq3poxhpuggqbwywttk5eg9e5wnlg6',
+        'chart_url': 'https://coinmarketcap.com/dexscan/solana/2KB3i5uLKhUcjUwq3poxHpuGGqBWYwtTk5eG9E5WnLG6/',
+        'chart_symbol': 'TETSUO/USD',  # As labelled on the CMC TradingView chart
+        'pair_label': 'TETSUO/SOL',    # As shown on native charts
+        'price_decimals': 4,
+        'market_cap_unit': 'M',
+        'nickname_format': 'EngageXD {value:.1f}M {arrow}',  # Ticker bot nickname
+        'nickname_scale': 1000     # Price multiplier for {value} (1B supply, shown in $M)
+    },
+    'sol': {
+        'symbol': 'SOL',
+        'name': 'Solana',
+        'address': 'So11111111111111111111111111111111111111112',  # Wrapped SOL
+        'batch': False,            # Too many pools to share a tokens request
+        'yfinance_symbol': 'SOL-USD',
+        'network': 'solana',
+        'sources': ['dexscreener', 'geckoterminal', 'yfinance'],
+        'url': 'https://dexscreener.com/solana/So11111111111111111111111111111111111111112',  # Top wSOL pair
+        'chart_url': 'https://coinmarketcap.com/dexscan/osmosis/1960/',
+        'chart_symbol': 'SOL/USD',
+        'chart_tradingview_toggle': True,  # CMC page may open on its own chart first
+        'pair_label': 'SOL/USD',
+        'price_decimals': 2,
+        'market_cap_unit': 'B',
+        'nickname_format': 'SOL ${value:.2f} {arrow}',
+        'nickname_scale': 1
+    }
 }
 
 # Chart settings
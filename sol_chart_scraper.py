@@ -1,50 +1,36 @@
-from playwright.async_api import async_playwright
 import time
 import os
 import settings
+import browser_pool
+import page_router
+import cmc_session
+from chart_ready import ChartReadiness
 
 async def capture_sol_chart_async(headless=True, timeframe: str = '1h'):
     """Async function to capture SOL chart from CMC"""
-    url = "https://coinmarketcap.com/dexscan/osmosis/1960/"
-    browser = None
+    url = settings.TOKENS['sol']['chart_url']
     
-    async with async_playwright() as p:
-        try:
-            print("\nStarting SOL chart capture...")
-            
-            browser = await p.chromium.launch(
-                headless=headless,
-                args=['--disable-blink-features=AutomationControlled']
-            )
-            
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                screen={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            
-            page = await context.new_page()
+    try:
+        print("\nStarting SOL chart capture...")
+        
+        async with browser_pool.page(headless=headless) as page:
+            route_stats = await page_router.attach(page)
             
             print("\nNavigating to CMC...")
             await page.goto(url, wait_until='domcontentloaded', timeout=30000)
             
-            # Wait for header and add delay
+            # Wait for the header, then only run setup clicks the saved state didn't cover
             await page.wait_for_selector(".HeaderV3_main-header__xTs_o", timeout=10000)
-            await page.wait_for_timeout(5000)  # 5 second delay
-            
-            # Enable dark mode and handle initial page setup
-            print("\nSetting up page preferences...")
-            await page.locator(".UserDropdown_user-avatar-wrapper__YEFUG > .sc-65e7f566-0").click()
-            await page.get_by_role("heading", name="Dark").click()
-            await page.locator(".HeaderV3_main-header__xTs_o").click()
+            ran_setup = False
+            if not await cmc_session.is_dark_mode(page):
+                await page.locator(".UserDropdown_user-avatar-wrapper__YEFUG > .sc-65e7f566-0").wait_for(state="visible", timeout=10000)
+                
+                # Enable dark mode and handle initial page setup
+                print("\nSetting up page preferences...")
+                ran_setup = await cmc_session.enable_dark_mode(page)
             
             # Switch to TradingView chart if needed
-            try:
-                tradingview_button = page.get_by_role("button", name="TradingView")
-                await tradingview_button.wait_for(state="visible", timeout=5000)
-                await tradingview_button.click()
-            except:
-                print("Already on TradingView chart or button not found")
+            ran_setup = await cmc_session.show_tradingview(page) or ran_setup
             
             print("\nLooking for TradingView iframe...")
             iframe = await page.wait_for_selector("iframe[name^='tradingview_']", timeout=15000)
@@ -52,7 +38,7 @@ async def capture_sol_chart_async(headless=True, timeframe: str = '1h'):
             
             # Wait for chart elements
             print("\nWaiting for chart elements...")
-            await frame.get_by_label("Chart for SOL/USD, 1 hour").wait_for(timeout=10000)
+            await frame.get_by_label(f"Chart for {settings.TOKENS['sol']['chart_symbol']}, 1 hour").wait_for(timeout=10000)
             await frame.locator(".price-axis > canvas:nth-child(2)").wait_for(timeout=10000)
             await frame.locator("div:nth-child(2) > div:nth-child(2) > div > canvas:nth-child(2)").wait_for(timeout=10000)
             
@@ -65,38 +51,50 @@ async def capture_sol_chart_async(headless=True, timeframe: str = '1h'):
                 "1d": "1 day"
             }
             print(f"\nSetting {timeframe} timeframe...")
-            await frame.get_by_role("button", name="Time Interval").click()
-            await frame.get_by_text(timeframe_map[timeframe]).click()
-            
-            # Wait for chart to stabilize
-            await page.wait_for_timeout(5000)
+            readiness = ChartReadiness(page)
+            try:
+                await frame.get_by_role("button", name="Time Interval").click()
+                await frame.get_by_text(timeframe_map[timeframe]).click()
+                
+                # Wait for chart to stabilize
+                await readiness.wait(frame, timeframe_map[timeframe])
+            finally:
+                readiness.detach()
             
             print("\nTaking screenshot...")
-            os.makedirs("screenshots", exist_ok=True)
-            screenshot_path = "screenshots/sol_chart.png"
-            
             chart_widget = frame.locator(".chart-widget").first
-            await chart_widget.screenshot(path=screenshot_path)
+            data = await chart_widget.screenshot()
+            
+            if ran_setup:
+                await cmc_session.save_state(page.context)
             
-            print(f"\n✅ Screenshot saved to: {screenshot_path}")
+            print(f"\n✅ Captured SOL chart ({len(data) / 1024:.0f} KB)")
+            if route_stats:
+                print(f"Capture traffic: {route_stats.summary()}")
             
             if not headless:
                 print("\nKeeping browser open for 10 seconds...")
                 await page.wait_for_timeout(10000)
             
-            await browser.close()
-            return screenshot_path
+            return data
             
-        except Exception as e:
-            print(f"\n❌ Error during capture: {str(e)}")
-            if browser:
-                await browser.close()
-            return None
+    except Exception as e:
+        print(f"\n❌ Error during capture: {str(e)}")
+        cmc_session.invalidate()
+        return None
 
 def debug_sol_chart(headless=False, timeframe='1h'):
-    """Synchronous wrapper for debugging"""
+    """Synchronous wrapper for debugging, saves the PNG for inspection"""
     import asyncio
-    return asyncio.run(capture_sol_chart_async(headless=headless, timeframe=timeframe))
+    data = asyncio.run(capture_sol_chart_async(headless=headless, timeframe=timeframe))
+    if data is None:
+        return None
+    os.makedirs(settings.SCREENSHOT_DIR, exist_ok=True)
+    screenshot_path = f"{settings.SCREENSHOT_DIR}/sol_chart.png"
+    with open(screenshot_path, 'wb') as f:
+        f.write(data)
+    print(f"\n✅ Screenshot saved to: {screenshot_path}")
+    return screenshot_path
 
 if __name__ == "__main__":
     debug_sol_chart(headless=False)  # Run in visible mode when run directly
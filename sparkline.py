@@ -0,0 +1,70 @@
+import io
+import time
+import numpy as np
+import settings
+import price_store
+
+UP_COLOR = (38, 166, 154)     # Matches the chart candles
+DOWN_COLOR = (239, 83, 80)
+SUPERSAMPLE = 2               # Drawn at 2x and downscaled for smooth lines
+PADDING = 4                   # Pixels kept clear above and below the line
+
+# token -> (sample count, PNG bytes), so each price tick renders at most once
+_cache = {}
+
+def points(ts, price, width, height):
+    """
+    Map samples onto one point per pixel column, oldest on the left
+
+    Returns:
+        ndarray: (width, 2) array of x, y pixel coordinates
+    """
+    xs = np.linspace(ts[0], ts[-1], width)
+    ys = np.interp(xs, ts, price)
+    low, high = ys.min(), ys.max()
+    if high > low:
+        y = PADDING + (high - ys) / (high - low) * (height - 1 - 2 * PADDING)
+    else:
+        y = np.full(width, height / 2)
+    return np.column_stack((np.arange(width, dtype=float), y))
+
+def render(ts, price, width=None, height=None):
+    """Rasterize a price series into a transparent PNG, returned as bytes"""
+    from PIL import Image, ImageDraw
+    width = width or settings.SPARKLINE_WIDTH
+    height = height or settings.SPARKLINE_HEIGHT
+    w, h = width * SUPERSAMPLE, height * SUPERSAMPLE
+    color = UP_COLOR if price[-1] >= price[0] else DOWN_COLOR
+
+    # One point per output pixel is plenty, scaled up to the drawing canvas
+    line = points(ts, price, width, height) * SUPERSAMPLE
+    image = Image.new('RGBA', (w, h), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    coords = line.ravel().tolist()
+    draw.polygon([0, h] + coords + [w - 1, h], fill=color + (48,))
+    draw.line(coords, fill=color + (255,), width=2 * SUPERSAMPLE)
+    image = image.resize((width, height), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', compress_level=1)
+    return buffer.getvalue()
+
+def get(token_type, hours=None):
+    """
+    Sparkline of the last `hours` of recorded prices for a token
+
+    Returns:
+        bytes: PNG data, or None if there isn't enough history yet
+    """
+    hours = settings.SPARKLINE_HOURS if hours is None else hours
+    series = price_store.store.series(token_type)
+    cached = _cache.get(token_type)
+    if cached and cached[0] == series.total:
+        return cached[1]
+
+    samples = series.range(time.time() - hours * 3600)
+    if len(samples) < 2:
+        return None
+    data = render(samples['ts'], samples['price'])
+    _cache[token_type] = (series.total, data)
+    return data
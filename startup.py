@@ -0,0 +1,82 @@
+import sys
+import time
+
+# Startup timing. bot.py imports this first, so STARTED is close to process
+# start and every later top-level import, eager or lazy, gets timed.
+
+STARTED = time.perf_counter()
+
+import_times = {}   # top-level module -> seconds to import it, its own imports included
+milestones = []     # (name, seconds since STARTED)
+
+class _TimedLoader:
+    """Times one module's execution, then puts its real loader back"""
+
+    def __init__(self, loader):
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        # The module keeps its real loader, the wrapper is only on the import path
+        module.__spec__.loader = self.loader
+        module.__loader__ = self.loader
+        started = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            import_times[module.__name__] = time.perf_counter() - started
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+class _ImportTimer:
+    """
+    Meta path finder that asks the other finders, in their usual order, for
+    a top-level module's spec and wraps the loader they return with a timer
+    """
+
+    def find_spec(self, name, path=None, target=None):
+        if path is not None or '.' in name:
+            return None  # Submodules count towards their top-level package
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, 'find_spec', None)
+            if finder is self or find_spec is None:
+                continue
+            spec = find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader)
+        return spec
+
+def time_imports():
+    """Start timing imports, from here on"""
+    if not any(isinstance(finder, _ImportTimer) for finder in sys.meta_path):
+        sys.meta_path.insert(0, _ImportTimer())
+
+def stop_timing_imports():
+    """Remove the import timer again, imports after this go untimed"""
+    sys.meta_path[:] = [finder for finder in sys.meta_path if not isinstance(finder, _ImportTimer)]
+
+def mark(name):
+    """Record a startup milestone the first time it is reached, returns True if it was new"""
+    if any(seen == name for seen, _ in milestones):
+        return False
+    elapsed = time.perf_counter() - STARTED
+    milestones.append((name, elapsed))
+    print(f"Startup: {name} after {elapsed:.2f}s")
+    return True
+
+def report(top=10):
+    """Print the slowest imports so far and every milestone"""
+    lines = ["Startup report:"]
+    slowest = sorted(import_times.items(), key=lambda item: item[1], reverse=True)[:top]
+    for module, seconds in slowest:
+        lines.append(f"  import {module}: {seconds * 1000:.0f}ms")
+    for name, elapsed in milestones:
+        lines.append(f"  {name}: {elapsed:.2f}s")
+    print("\n".join(lines))